@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# Benchmarks, Aufruf aus dem Repo-Verzeichnis z. B. mit: python -m bench.depdata
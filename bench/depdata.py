@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Laufzeit und Speicher der Datenverarbeitung (dm.depdata) für kleine Haltestellen bis große Knoten.
+# python -m bench.depdata [--json neu.json] [--compare alt.json]
+from argparse import ArgumentParser
+from datetime import timedelta, timezone
+from json import loads as json_loads
+from sys import exit
+from typing import Callable, Dict, List, Tuple
+import xml.etree.ElementTree as ET
+
+from loguru import logger
+
+from dm.depdata import CallableWithKwargs, DataSource, getdeps, readefaxml, readfptfjson, readninajson, readrssxml, type_depmsgdata
+from . import fixtures
+from .harness import Result, compare, measure, save
+
+tz = timezone(timedelta(hours=2))
+
+# Name: (Abfahrten, verschiedene Meldungen)
+SCENARIOS: Dict[str, Tuple[int, int]] = {
+    "small": (12, 3),
+    "medium": (60, 12),
+    "hub": (400, 80),
+}
+
+dest_replacements = [("Hagen ", ""), ("HA-", ""), (", Hagen (Westf)", ""), ("Hauptbahnhof", "Hbf"), ("Essen ", "")]
+uncut_destinations = {"Hagen Hauptbahnhof"}
+
+
+def _efa(content: bytes, **kwargs) -> type_depmsgdata:
+    return readefaxml(ET.fromstring(content), tz, **kwargs)
+
+
+def _fptf(content: bytes, **kwargs) -> type_depmsgdata:
+    return readfptfjson(json_loads(content), **kwargs)
+
+
+def _nina(content: bytes, **kwargs) -> type_depmsgdata:
+    return readninajson(json_loads(content), tz, **kwargs)
+
+
+def _rss(content: bytes, **kwargs) -> type_depmsgdata:
+    return readrssxml(ET.fromstring(content), tz, **kwargs)
+
+
+def _datasources(efa: bytes, nina: bytes, rss: bytes) -> List[DataSource]:
+    ds_efa = DataSource("efa-main")
+    ds_efa.to_call.append(CallableWithKwargs(_efa, {'content': efa, 'ignore_infoIDs': {"1001_HST"}, 'itdNoTrain_remove_msg': {"Wagenreihung"}}, 0))
+    ds_nina = DataSource("nina", critical=False)
+    ds_nina.to_call.append(CallableWithKwargs(_nina, {'content': nina, 'ignore_msgType': {"Update", "Cancel"}}, 0))
+    ds_rss = DataSource("rss", critical=False)
+    ds_rss.to_call.append(CallableWithKwargs(_rss, {'content': rss, 'limit': 3}, 0))
+    return [ds_efa, ds_nina, ds_rss]
+
+
+def benchmarks(scenarios: List[str]) -> Dict[str, Callable[[], object]]:
+    nina = fixtures.nina_json(40)
+    rss = fixtures.rss_xml(30)
+    result: Dict[str, Callable[[], object]] = {
+        "nina": lambda: _nina(nina),
+        "rss": lambda: _rss(rss),
+    }
+    for name in scenarios:
+        departures, infolinks = SCENARIOS[name]
+        efa = fixtures.efa_xml(departures, infolinks, tz=tz)
+        fptf = fixtures.fptf_json(departures, infolinks, tz=tz)
+        datasources = _datasources(efa, nina, rss)
+        logger.info(f"{name}: EFA {len(efa) // 1024} KiB, fptf {len(fptf) // 1024} KiB")
+        result[f"efa.{name}"] = lambda efa=efa: _efa(efa)
+        result[f"fptf.{name}"] = lambda fptf=fptf, departures=departures: _fptf(fptf, limit=departures)
+        result[f"getdeps.{name}"] = lambda datasources=datasources: getdeps(
+            datasources,
+            getdeps_timezone=tz,
+            getdeps_lines=8,
+            getdeps_dest_replacements=dest_replacements,
+            getdeps_dest_replacements_uncut=uncut_destinations,
+            getdeps_mincountdown=-9)
+    return result
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="benchmark for departure/message data processing")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS.keys(), help="only run these scenarios, can be used multiple times", default=[], dest="scenarios")
+    parser.add_argument("--runs", action="store", help="timed runs per benchmark", default=50, type=int)
+    parser.add_argument("--json", action="store", help="write results to this file", default="", type=str)
+    parser.add_argument("--compare", action="store", help="compare median times with results saved with --json earlier, exit code 1 on regressions", default="", type=str)
+    parser.add_argument("--tolerance", action="store", help="allowed relative slowdown for --compare", default=0.15, type=float)
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    for _name, _fn in benchmarks(args.scenarios or list(SCENARIOS)).items():
+        results.append(measure(_name, _fn, runs=args.runs))
+        print(results[-1].line())
+
+    if args.json:
+        save(results, args.json)
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for _r in regressions:
+            print(f"REGRESSION {_r}")
+        if regressions:
+            exit(1)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Erzeugt Antworten im Format von EFA (XML_DM_REQUEST), db-rest (fptf), NINA und RSS,
+# angelehnt an aufgezeichnete Antworten, mit festem Seed und Zeiten relativ zu now.
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from json import dumps
+from random import Random
+from typing import Any, Dict, List, Optional
+import xml.etree.ElementTree as ET
+
+_places = ["Hagen", "Essen", "Dortmund", "Bochum", "Wuppertal", "Schwerte", "Iserlohn", "Witten"]
+_stops = ["Hauptbahnhof", "Stadtmitte/Volme Galerie", "Emilienplatz", "Haspe Zentrum", "Vorhalle", "Breckerfeld Busbahnhof",
+          "Ruhr-Universität", "Rathaus Süd", "Am Stadtgarten", "Bergstraße", "Kirchplatz", "Universität Ost", "Berliner Platz"]
+_messages = ["Haltestelle wird wegen Bauarbeiten nicht bedient, bitte nutzen Sie die Ersatzhaltestelle.",
+             "Umleitung wegen einer Veranstaltung in der Innenstadt.",
+             "Fahrplanänderung zwischen den Haltestellen, Details unter www.example.invalid",
+             "Störung.", "Bauarbeiten.", "Information.",
+             "Aufzug außer Betrieb.",
+             "Einzelne Fahrten entfallen aufgrund von Personalmangel."]
+
+# (EFA motType, Liniennummern)
+_lines = [(5, ["512", "513", "514", "515", "516", "517", "518", "519", "521", "527", "528", "530", "535", "538", "539", "541", "542", "543", "591", "SB71", "SB72", "CE61", "NE1", "NE3"]),
+          (0, ["RE4", "RE7", "RE16", "RB40", "RB52", "RB91", "S5", "S8"]),
+          (16, ["ICE 10", "IC 2026", "ICE 945"]),
+          (4, ["U11", "U17", "U18", "101", "105", "107"])]
+
+
+def _direction(rnd: Random) -> str:
+    _d = f"{rnd.choice(_places)} {rnd.choice(_stops)}"
+    # EFA hängt teilweise den Ort noch einmal an ("Aachen, Hbf,Aachen")
+    if rnd.random() < 0.1:
+        _d += "," + _d.split()[0]
+    return _d
+
+
+def _infolink(parent: ET.Element, rnd: Random, infoid: int) -> None:
+    il = ET.SubElement(parent, "infoLink")
+    pl = ET.SubElement(il, "paramList")
+    for _n, _v in (("infoType", rnd.choice(["lineInfo", "stopInfo", "stopBlocking"])), ("infoID", f"{infoid}_HST")):
+        _p = ET.SubElement(pl, "param")
+        ET.SubElement(_p, "name").text = _n
+        ET.SubElement(_p, "value").text = _v
+    _text = _messages[infoid % len(_messages)]
+    kind = infoid % 3
+    if kind == 0:
+        ET.SubElement(il, "infoLinkText").text = _text
+        it = ET.SubElement(il, "infoText")
+        ET.SubElement(it, "content").text = "Weitere Informationen: " + _messages[(infoid + 1) % len(_messages)]
+    elif kind == 1:
+        it = ET.SubElement(il, "infoText")
+        ET.SubElement(it, "subject").text = f"Meldung {infoid}:"
+        ET.SubElement(it, "subtitle").text = _text
+    else:
+        ET.SubElement(il, "infoLinkText").text = _text
+        it = ET.SubElement(il, "infoText")
+        oct_ = ET.SubElement(it, "outputClientText")
+        ET.SubElement(oct_, "smsText").text = f"{_text} (#{infoid})"
+
+
+def _datetime(parent: ET.Element, tag: str, dt: datetime) -> None:
+    e = ET.SubElement(parent, tag)
+    ET.SubElement(e, "itdDate", year=str(dt.year), month=str(dt.month), day=str(dt.day), weekday=str(dt.isoweekday()))
+    ET.SubElement(e, "itdTime", hour=str(dt.hour), minute=str(dt.minute))
+
+
+def efa_xml(departures: int, infolinks: int, stop_infolinks: int = 2, seed: int = 1,
+            now: Optional[datetime] = None, tz: timezone = timezone.utc) -> bytes:
+    # infolinks: Anzahl verschiedener Meldungen, die auf die Abfahrten verteilt werden
+    rnd = Random(seed)
+    now = (now or datetime.now(tz)).replace(second=0, microsecond=0)
+    root = ET.Element("itdRequest", version="10.2.10.139", language="de", now=now.isoformat())
+    dmr = ET.SubElement(root, "itdDepartureMonitorRequest", requestID="1")
+    odv = ET.SubElement(dmr, "itdOdv", type="stop", usage="dm")
+    odvplace = ET.SubElement(odv, "itdOdvPlace", state="identified")
+    ET.SubElement(odvplace, "odvPlaceElem", placeID="5914000").text = "Hagen"
+    odvname = ET.SubElement(odv, "itdOdvName", state="identified")
+    ET.SubElement(odvname, "odvNameElem", stopID="20016000").text = "Hagen Hauptbahnhof"
+    for _i in range(stop_infolinks):
+        _infolink(odvname, rnd, 1000 + _i)
+
+    deplist = ET.SubElement(dmr, "itdDepartureList")
+    for _i in range(departures):
+        planned = now + timedelta(minutes=_i * 90 // max(1, departures) + rnd.randint(0, 2))
+        mottype, names = rnd.choice(_lines)
+        linenum = rnd.choice(names)
+        realtime = rnd.random() < 0.85
+        cancelled = realtime and rnd.random() < 0.03
+        delay = -9999 if cancelled else (rnd.choice([0, 0, 0, 1, 2, 3, 5, 12]) if realtime else 0)
+        actual = planned + timedelta(minutes=max(0, delay))
+        countdown = int((actual - now).total_seconds() // 60)
+        platform = str(rnd.randint(1, 12))
+        dep = ET.SubElement(deplist, "itdDeparture", stopID="20016000", x="7459520", y="51362370", mapName="WGS84",
+                            area="1", platform=platform, gid=f"de:05914:2007:1:{platform}",
+                            pointType="Gleis" if mottype in {0, 16} else "Bstg.", platformName=platform if rnd.random() < 0.9 else "",
+                            nameWO="Hauptbahnhof", countdown=str(countdown))
+        _datetime(dep, "itdDateTime", planned)
+        if realtime and not cancelled:
+            _datetime(dep, "itdRTDateTime", actual)
+        direction = _direction(rnd)
+        sl = ET.SubElement(dep, "itdServingLine", key=str(rnd.randint(1, 9999)), code="5", number=linenum,
+                           symbol=linenum, motType=str(mottype), realtime=str(int(realtime)), direction=direction,
+                           destID=str(rnd.randint(20000000, 29999999)), stateless=f"vrr:{linenum}:E:H:j22")
+        notrain = ET.SubElement(sl, "itdNoTrain", name="Bus" if mottype == 5 else "Zug", delay=str(delay))
+        if rnd.random() < 0.05:
+            notrain.text = f"{linenum} fährt heute mit geänderter Wagenreihung"
+        ET.SubElement(sl, "itdRouteDescText").text = f"{rnd.choice(_places)} - {direction}"
+        gal = ET.SubElement(dep, "genAttrList")
+        for _n, _v in (("OperatorCode", "HST"), ("TRAIN_TYPE" if mottype in {0, 16} else "BUS_TYPE", "HIGHSPEEDTRAIN" if mottype == 16 else "REGULAR")):
+            _ga = ET.SubElement(gal, "genAttrElem")
+            ET.SubElement(_ga, "name").text = _n
+            ET.SubElement(_ga, "value").text = _v
+        if not cancelled and rnd.random() < 0.04:
+            _ga = ET.SubElement(gal, "genAttrElem")
+            ET.SubElement(_ga, "name").text = "EarlyTermination"
+            ET.SubElement(_ga, "value").text = _direction(rnd)
+        if infolinks:
+            ill = ET.SubElement(dep, "itdInfoLinkList")
+            for _j in range(rnd.choice([0, 0, 1, 1, 2, 3])):
+                _infolink(ill, rnd, rnd.randrange(infolinks))
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def fptf_json(departures: int, remarks: int, seed: int = 2, now: Optional[datetime] = None, tz: timezone = timezone.utc) -> bytes:
+    rnd = Random(seed)
+    now = (now or datetime.now(tz)).replace(microsecond=0)
+    products = [("bus", "bus"), ("regional", "train"), ("suburban", "train"), ("nationalExp", "train"), ("tram", "train")]
+    data: List[Dict[str, Any]] = []
+    for _i in range(departures):
+        product, mode = rnd.choice(products)
+        planned = now + timedelta(minutes=_i * 120 // max(1, departures))
+        cancelled = rnd.random() < 0.03
+        delay = None if rnd.random() < 0.2 else rnd.choice([0, 0, 60, 120, 300, 900])
+        when = None if cancelled else (planned + timedelta(seconds=delay or 0)).isoformat()
+        dep: Dict[str, Any] = {
+            "tripId": f"1|{rnd.randint(100000, 999999)}|0|80|{now:%d%m%Y}",
+            "stop": {"type": "stop", "id": "8000142", "name": "Hagen Hbf",
+                     "station": {"type": "station", "id": "8000142", "name": "Hagen Hbf"}},
+            "when": when, "plannedWhen": planned.isoformat(), "delay": delay,
+            "platform": str(rnd.randint(1, 20)), "plannedPlatform": str(rnd.randint(1, 20)),
+            "direction": _direction(rnd),
+            "line": {"type": "line", "id": f"l{_i}", "name": ("Bus " if product == "bus" else "") + rnd.choice(rnd.choice(_lines)[1]),
+                     "mode": mode, "product": product},
+            "remarks": [{"type": rnd.choice(["hint", "warning", "status"]), "code": rnd.choice(["FB", "RO", "bf", None]),
+                         "summary": _messages[_r % len(_messages)] if _r % 2 else None,
+                         "text": _messages[(_r * 7) % len(_messages)] + "\n(Quelle: DB)"}
+                        for _r in rnd.sample(range(max(1, remarks)), k=min(remarks, rnd.choice([0, 1, 2, 4])))],
+        }
+        if cancelled:
+            dep["cancelled"] = True
+            dep["scheduledWhen"] = planned.isoformat()
+        if rnd.random() < 0.05:
+            dep["formerScheduledPlatform"] = str(rnd.randint(1, 20))
+        data.append(dep)
+    return dumps(data).encode("utf-8")
+
+
+def _nina_time(dt: datetime) -> str:
+    return dt.isoformat(timespec="seconds")
+
+
+def nina_json(warnings: int, seed: int = 3, now: Optional[datetime] = None, tz: timezone = timezone(timedelta(hours=2))) -> bytes:
+    rnd = Random(seed)
+    now = (now or datetime.now(tz)).replace(microsecond=0)
+    data: List[Dict[str, Any]] = []
+    for _i in range(warnings):
+        onset = now - timedelta(hours=rnd.randint(0, 30))
+        warning: Dict[str, Any] = {
+            "id": f"dwdmap.2.49.0.0.276.0.DWD.PVW.{rnd.randint(10**11, 10**12)}",
+            "payload": {"version": 1, "type": "ALERT", "id": f"w{_i}", "hash": f"{rnd.getrandbits(64):016x}",
+                        "data": {"headline": rnd.choice(["Amtliche WARNUNG vor STURMBÖEN", "Amtliche WARNUNG vor GLÄTTE",
+                                                         "Hochwasserinformation", "Gefahreninformation: Großbrand"]),
+                                 "provider": rnd.choice(["DWD", "MOWAS", "LHP"]),
+                                 "severity": rnd.choice(["Minor", "Moderate", "Severe"]),
+                                 "msgType": rnd.choice(["Alert", "Alert", "Update", "Cancel"]),
+                                 "transKeys": {"event": "BBK-EVC-001"}, "area": {"type": "ZGEM", "data": "5914000"}}},
+            "i18nTitle": {"de": "..."},
+            "sent": _nina_time(onset - timedelta(minutes=5)),
+        }
+        if rnd.random() < 0.8:
+            warning["onset"] = _nina_time(onset)
+        if rnd.random() < 0.7:
+            warning["expires"] = _nina_time(now + timedelta(hours=rnd.randint(-2, 48)))
+        data.append(warning)
+    return dumps(data).encode("utf-8")
+
+
+def rss_xml(items: int, seed: int = 4, now: Optional[datetime] = None, tz: timezone = timezone(timedelta(hours=2))) -> bytes:
+    rnd = Random(seed)
+    now = (now or datetime.now(tz)).replace(microsecond=0)
+    rss = ET.Element("rss", version="2.0")
+    channel = ET.SubElement(rss, "channel")
+    ET.SubElement(channel, "title").text = "Pressemitteilungen"
+    for _i in range(items):
+        item = ET.SubElement(channel, "item")
+        ET.SubElement(item, "title").text = f"{rnd.choice(_messages)} ({_i})"
+        ET.SubElement(item, "link").text = f"https://www.example.invalid/{_i}"
+        ET.SubElement(item, "pubDate").text = format_datetime(now - timedelta(hours=_i * 7 + rnd.randint(0, 6)))
+        for _c in rnd.sample(["Presse", "Termine", "Studium", "Forschung"], k=rnd.randint(1, 2)):
+            ET.SubElement(item, "category").text = _c
+        ET.SubElement(item, "description").text = " ".join(rnd.choice(_messages) for _ in range(5))
+    return ET.tostring(rss, encoding="utf-8", xml_declaration=True)
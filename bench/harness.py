@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from dataclasses import asdict, dataclass
+from gc import collect, disable as gc_disable, enable as gc_enable, isenabled as gc_isenabled
+from json import dump as json_dump, load as json_load
+from statistics import median
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+import tracemalloc
+
+
+@dataclass
+class Result:
+    name: str
+    runs: int
+    min_ms: float
+    median_ms: float
+    max_ms: float
+    # pro Aufruf: Anzahl und Größe der Speicherblöcke, die danach noch belegt sind, und Spitzenverbrauch
+    alloc_blocks: int
+    alloc_kib: float
+    peak_kib: float
+
+    def line(self) -> str:
+        return (f"{self.name:<28} {self.median_ms:9.3f} ms (min {self.min_ms:.3f}, max {self.max_ms:.3f}, n={self.runs})"
+                f"  peak {self.peak_kib:8.1f} KiB  retained {self.alloc_blocks} blocks / {self.alloc_kib:.1f} KiB")
+
+
+def measure(name: str, fn: Callable[[], Any], runs: int = 50, warmup: int = 3) -> Result:
+    for _ in range(warmup):
+        fn()
+
+    # Zeit ohne tracemalloc (das verlangsamt jede Allokation) und ohne GC-Läufe zwischendurch
+    times: List[float] = []
+    gc_was_enabled = gc_isenabled()
+    collect()
+    gc_disable()
+    try:
+        for _ in range(runs):
+            _start = perf_counter()
+            fn()
+            times.append(perf_counter() - _start)
+    finally:
+        if gc_was_enabled:
+            gc_enable()
+
+    # Speicher in einem eigenen Durchlauf
+    collect()
+    tracemalloc.start()
+    try:
+        _before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        _base = tracemalloc.get_traced_memory()[0]
+        _result = fn()
+        _peak = tracemalloc.get_traced_memory()[1] - _base
+        _after = tracemalloc.take_snapshot()
+        _stats = _after.compare_to(_before, "filename")
+        _blocks = sum(_s.count_diff for _s in _stats)
+        _size = sum(_s.size_diff for _s in _stats)
+        del _result
+    finally:
+        tracemalloc.stop()
+
+    return Result(name=name, runs=runs,
+                  min_ms=round(min(times) * 1000, 4), median_ms=round(median(times) * 1000, 4), max_ms=round(max(times) * 1000, 4),
+                  alloc_blocks=_blocks, alloc_kib=round(_size / 1024, 1), peak_kib=round(_peak / 1024, 1))
+
+
+def save(results: List[Result], path: str) -> None:
+    with open(path, "w") as f:
+        json_dump({r.name: asdict(r) for r in results}, f, indent=1)
+
+
+def compare(results: List[Result], path: str, tolerance: float) -> List[str]:
+    # Vergleich der Mediane mit einer früher gespeicherten Ausgabe, gibt Regressionen zurück
+    with open(path) as f:
+        baseline: Dict[str, Dict[str, Any]] = json_load(f)
+    regressions = []
+    for r in results:
+        _b: Optional[Dict[str, Any]] = baseline.get(r.name)
+        if _b is None:
+            continue
+        _ratio = r.median_ms / _b["median_ms"] if _b["median_ms"] else 1.0
+        if _ratio > 1 + tolerance:
+            regressions.append(f"{r.name}: {_b['median_ms']:.3f} -> {r.median_ms:.3f} ms (+{(_ratio - 1) * 100:.0f} %)")
+    return regressions
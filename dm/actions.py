@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 
 from . import config
+from .sysmetrics import sampler
 from dataclasses import dataclass
 from datetime import datetime
 from time import time
 from subprocess import check_output
-from sys import stdout
 from typing import Callable, Optional
 
 from requests import post
@@ -48,7 +48,9 @@ def check_restart_application(action):
 
 def check_restart_system(action):
     action_ts = int(action["timestamp"])
-    start_ts = int(check_output('date -d "$(</proc/uptime awk \'{print $1}\') seconds ago" "+%s"', shell=True).decode(stdout.encoding).strip())
+    start_ts = sampler.boot_time()
+    if start_ts is None:
+        raise OSError("boot time not available")
     return start_ts > action_ts
 
 '''
@@ -1,29 +1,40 @@
 # -*- coding: utf-8 -*-
 from subprocess import check_output
-from rgbmatrix import graphics
+from time import struct_time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+from PIL import Image
+
+from .backend import FrameCanvas, graphics
 from .drawstuff import clockstr_tt, drawppm_bottomleft, drawppm_topcentered, drawppm_centered, drawsecpixels, drawverticaltime
 from .lines import textpx
+from .sprites import drawtext
+
+
+def _ppmindex(i, step, n):
+    return int(((i % step)/step)*n)
 
 
 def rightbar_wide(canvas, x, y, rightbarwidth, font, color, i, step, currenttime, ppmlist):
     timestr = clockstr_tt(currenttime)
-    graphics.DrawText(canvas, font, canvas.width-rightbarwidth+(rightbarwidth-textpx(font, timestr))//2, font.baseline, color, timestr)
+    drawtext(canvas, font, canvas.width-rightbarwidth+(rightbarwidth-textpx(font, timestr))//2, font.baseline, color, timestr)
     # Temperatur
     # pitemp = int(Decimal(int(check_output(['cat', '/sys/class/thermal/thermal_zone0/temp']).decode('utf-8').strip())/1000).quantize(0, ROUND_HALF_UP))
     pitemp = "--"
     tempstr = str(pitemp)
     degstr = "°"
     _temppos = canvas.width-rightbarwidth+(rightbarwidth-textpx(font, tempstr))//2
-    _temppos += graphics.DrawText(canvas, font, _temppos, canvas.height-1, color, tempstr)
-    graphics.DrawText(canvas, font, _temppos, canvas.height-1, color, degstr)
+    _temppos += drawtext(canvas, font, _temppos, canvas.height-1, color, tempstr)
+    drawtext(canvas, font, _temppos, canvas.height-1, color, degstr)
     # Bilder
-    drawppm_centered(canvas, ppmlist[int(((i % step)/step)*len(ppmlist))], canvas.width-1-rightbarwidth//2, canvas.height//2)
+    drawppm_centered(canvas, ppmlist[_ppmindex(i, step, len(ppmlist))], canvas.width-1-rightbarwidth//2, canvas.height//2)
 
 
 def rightbar_tmp(canvas, x, y, rightbarwidth, font, color, i, step, currenttime, logoppm, seccolor=None):  #, r_scroller=None):
     timestr = clockstr_tt(currenttime)
     y += font.baseline + 1
-    tw = graphics.DrawText(canvas, font, canvas.width-rightbarwidth+(rightbarwidth-textpx(font, timestr))//2, y, color, timestr) - 1
+    tw = drawtext(canvas, font, canvas.width-rightbarwidth+(rightbarwidth-textpx(font, timestr))//2, y, color, timestr) - 1
     drawsecpixels(canvas, tuple((x+_,y) for _ in range(tw)), currenttime.tm_sec, seccolor or color)
     y += 2
     drawppm_topcentered(canvas, logoppm, canvas.width-1-rightbarwidth//2, y)
@@ -35,6 +46,100 @@ def rightbar_verticalclock(canvas, x, y, rightbarwidth, font, color, i, step, cu
     drawverticaltime(canvas, font, x+1, y+font.height, color, currenttime.tm_hour, currenttime.tm_min, currenttime.tm_sec if showsecs else None)
 
 
+# wovon der Inhalt der Bereiche abhängt, Argumente ab i wie beim Bereich selbst
+_areakeys: Dict[Callable, Callable[..., Hashable]] = {
+    rightbar_wide: lambda i, step, currenttime, ppmlist: (currenttime.tm_hour, currenttime.tm_min, _ppmindex(i, step, len(ppmlist))),
+    rightbar_tmp: lambda i, step, currenttime, logoppm, seccolor=None: (currenttime.tm_hour, currenttime.tm_min, currenttime.tm_sec),
+    rightbar_verticalclock: lambda i, step, currenttime, showsecs: (currenttime.tm_hour, currenttime.tm_min, currenttime.tm_sec if showsecs else None),
+}
+
+
+class _AreaCanvas:
+    # Ausschnitt (ox, oy, w, h) eines Canvas mit width x height, Koordinaten wie auf dem ganzen Canvas.
+    # Kann nur, was die Bereiche brauchen: SetPixel und SetImage (auch Text über sprites.drawtext)
+    def __init__(self, width: int, height: int, ox: int, oy: int, w: int, h: int):
+        self.width = width
+        self.height = height
+        self.ox = ox
+        self.oy = oy
+        self.buffer = np.zeros((h, w, 3), dtype=np.uint8)
+
+    def SetPixel(self, x: int, y: int, red: int, green: int, blue: int) -> None:
+        x -= self.ox
+        y -= self.oy
+        if 0 <= y < self.buffer.shape[0] and 0 <= x < self.buffer.shape[1]:
+            self.buffer[y, x] = (red, green, blue)
+
+    def SetImage(self, image: Image.Image, offset_x: int = 0, offset_y: int = 0, unsafe: bool = True, transp: bool = False) -> None:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        offset_x -= self.ox
+        offset_y -= self.oy
+        h, w = self.buffer.shape[:2]
+        x0, y0 = max(0, offset_x), max(0, offset_y)
+        x1, y1 = min(w, offset_x + image.size[0]), min(h, offset_y + image.size[1])
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = np.asarray(image)[y0 - offset_y:y1 - offset_y, x0 - offset_x:x1 - offset_x]
+        dst = self.buffer[y0:y1, x0:x1]
+        if transp:
+            mask = src.any(axis=2)
+            dst[mask] = src[mask]
+        else:
+            dst[:] = src
+
+    def image(self) -> Optional[Image.Image]:
+        if not self.buffer.any():
+            return None
+        return Image.fromarray(self.buffer, "RGB")
+
+
+class CachedArea:
+    # Bereich wie rightbar_* als fertiges Bild: neu gezeichnet wird nur, wenn sich der Inhalt ändert
+    # (Uhrzeit, Sekunden, wechselndes Bild, siehe _areakeys), sonst wird das Bild mit einem SetImage übernommen.
+    # Text muss dafür über sprites.drawtext gezeichnet werden können (Fonts mit BDF-Daten, Sprite-Cache aktiv).
+    def __init__(self, fn: Callable):
+        self.fn = fn
+        self.key = _areakeys[fn]
+        self._key: Optional[Hashable] = None
+        self._image: Optional[Image.Image] = None
+        self.rebuilds = 0
+        self.blits = 0
+
+    def __call__(self, canvas: FrameCanvas, x: int, y: int, rightbarwidth: int, font: graphics.Font, color: graphics.Color,
+                 i: int, step: int, currenttime: struct_time, *args: Any) -> None:
+        _key = (x, y, rightbarwidth, canvas.width, canvas.height, self.key(i, step, currenttime, *args))
+        if _key != self._key:
+            area = _AreaCanvas(canvas.width, canvas.height, x, y, rightbarwidth, canvas.height - y)
+            self.fn(area, x, y, rightbarwidth, font, color, i, step, currenttime, *args)
+            self._image = area.image()
+            self._key = _key
+            self.rebuilds += 1
+        if self._image is not None:
+            # transp: wie direkt auf den gerade geleerten Canvas gezeichnet
+            canvas.SetImage(self._image, x, y, True, True)
+            self.blits += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"rebuilds": self.rebuilds, "blits": self.blits}
+
+
+class ClockText:
+    # Text zur Uhrzeit, z. B. im Header: neu formatiert nur, wenn sich key(localtime) ändert (standardmäßig die Minute)
+    def __init__(self, fmt: Callable[[struct_time], str], key: Callable[[struct_time], Hashable] = lambda tt: tt[:5]):
+        self.fmt = fmt
+        self.keyfn = key
+        self._key: Optional[Hashable] = None
+        self.text = ""
+
+    def __call__(self, currenttime: struct_time) -> str:
+        _key = self.keyfn(currenttime)
+        if _key != self._key:
+            self.text = self.fmt(currenttime)
+            self._key = _key
+        return self.text
+
+
 def startscreen(canvas, font, color, ifopt, ppm):
     textpos = drawppm_bottomleft(canvas, ppm, 0, 7)
     graphics.DrawText(canvas, font, textpos + 1, 6, color, "DFI")
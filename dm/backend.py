@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Auswahl der Zeichenbibliothek beim Start über die Umgebungsvariable DM_BACKEND:
+#   rgbmatrix  rpi-rgb-led-matrix (Python-Bindings), nur auf dem Raspberry Pi
+#   headless   dm.headless, NumPy-Bildspeicher ohne Hardware, z. B. für Tests und Profiling
+#   auto       (Standard) rgbmatrix, falls installiert, sonst headless
+from os import environ
+
+from loguru import logger
+
+BACKENDS = ("auto", "rgbmatrix", "headless")
+
+BACKEND = environ.get("DM_BACKEND", "auto").strip().lower() or "auto"
+if BACKEND not in BACKENDS:
+    raise ValueError(f"DM_BACKEND must be one of {', '.join(BACKENDS)}, not {BACKEND!r}")
+
+if BACKEND != "headless":
+    try:
+        from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
+        from rgbmatrix.core import FrameCanvas
+    except ImportError:
+        if BACKEND == "rgbmatrix":
+            raise
+        logger.warning("rgbmatrix not available, using headless backend")
+        BACKEND = "headless"
+    else:
+        BACKEND = "rgbmatrix"
+
+if BACKEND == "headless":
+    from .headless import FrameCanvas, RGBMatrix, RGBMatrixOptions, graphics  # type: ignore[assignment]
+
+HEADLESS = BACKEND == "headless"
+
+__all__ = ["BACKEND", "HEADLESS", "FrameCanvas", "RGBMatrix", "RGBMatrixOptions", "graphics"]
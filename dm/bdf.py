@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+# BDF-Schriften in Python, gleiche Auslegung wie in rpi-rgb-led-matrix (bdf-font.cc),
+# damit Text auch außerhalb des Canvas (z. B. in PIL-Bilder) gezeichnet werden kann.
+# Geladen werden die Schriften in kompilierter Form (CompiledFont): Bitmaps aller Zeichen in einem
+# gepackten Array plus Tabellen für Breiten, Position und Größe. Mit cachedir wird die kompilierte Form
+# unter dem Hash der BDF-Datei gespeichert und bei späteren Starts ohne erneutes Parsen geladen.
+from array import array
+from dataclasses import dataclass
+from hashlib import sha256
+from os import makedirs, path as os_path, replace
+from struct import Struct
+from sys import byteorder
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+REPLACEMENT_CHARACTER = 0xFFFD
+
+MAGIC = b"BDFC"
+VERSION = 1
+# Magic, Version, height, baseline, Anzahl Zeichen, Länge der Bitmaps
+_header = Struct("<4sHhhII")
+
+cachedir: Optional[str] = None
+
+
+@dataclass
+class Glyph:
+    device_width: int
+    # gesetzte Pixel relativ zur Stiftposition (x) bzw. Grundlinie (y)
+    pixels: Tuple[Tuple[int, int], ...]
+
+
+@dataclass
+class BDFFont:
+    path: str
+    height: int
+    baseline: int
+    glyphs: Dict[int, Glyph]
+
+    def glyph(self, cp: int) -> Optional[Glyph]:
+        _g = self.glyphs.get(cp)
+        if _g is None:
+            _g = self.glyphs.get(REPLACEMENT_CHARACTER)
+        return _g
+
+    def character_width(self, cp: int) -> int:
+        # wie graphics.Font.CharacterWidth: -1 wenn nicht vorhanden, ohne Ersatzzeichen
+        _g = self.glyphs.get(cp)
+        return -1 if _g is None else _g.device_width
+
+    def text_width(self, text: str) -> int:
+        width = 0
+        for c in text:
+            _g = self.glyph(ord(c))
+            if _g is not None:
+                width += _g.device_width
+        return width
+
+
+def parse_bdf(path: str) -> BDFFont:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return _parse(f, path)
+
+
+def _parse(lines: Iterable[str], path: str) -> BDFFont:
+    height = 0
+    baseline = 0
+    glyphs: Dict[int, Glyph] = {}
+    cp: Optional[int] = None
+    device_width = 0
+    bbx = (0, 0, 0, 0)
+    rows: list = []
+    row = -1
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        keyword = parts[0]
+        if keyword == "FONTBOUNDINGBOX" and len(parts) == 5:
+            height = int(parts[2])
+            baseline = height + int(parts[4])
+        elif keyword == "ENCODING":
+            cp = int(parts[1])
+            device_width = 0
+            bbx = (0, 0, 0, 0)
+            rows = []
+            row = -1
+        elif keyword == "DWIDTH" and cp is not None:
+            device_width = int(parts[1])
+        elif keyword == "BBX" and cp is not None:
+            bbx = tuple(int(_p) for _p in parts[1:5])
+        elif keyword == "BITMAP" and cp is not None:
+            row = 0
+        elif keyword == "ENDCHAR" and cp is not None:
+            glyphs[cp] = _makeglyph(device_width, bbx, rows)
+            cp = None
+            row = -1
+        elif row >= 0 and cp is not None and row < bbx[1]:
+            rows.append(int(keyword, 16))
+            row += 1
+    return BDFFont(path=path, height=height, baseline=baseline, glyphs=glyphs)
+
+
+def _makeglyph(device_width: int, bbx: Tuple[int, int, int, int], rows: list) -> Glyph:
+    width, height, x_offset, y_offset = bbx
+    rowbits = 8 * ((width + 7) // 8)
+    pixels = []
+    for y, bits in enumerate(rows):
+        for c in range(rowbits):
+            x = c + x_offset
+            # wie bei rpi-rgb-led-matrix wird auf die Zeichenbreite (DWIDTH) beschnitten
+            if 0 <= x < device_width and bits & (1 << (rowbits - 1 - c)):
+                pixels.append((x, y - height - y_offset))
+    return Glyph(device_width=device_width, pixels=tuple(pixels))
+
+
+def _array(typecode: str, data: Any) -> array:
+    _a = array(typecode)
+    _a.frombytes(data)
+    if byteorder != "little":
+        _a.byteswap()
+    return _a
+
+
+def _tobytes(_a: array) -> bytes:
+    if byteorder != "little":
+        _a = array(_a.typecode, _a)
+        _a.byteswap()
+    return _a.tobytes()
+
+
+def compile_font(font: BDFFont) -> bytes:
+    # Aufbau: Header, Codepoints (uint32, sortiert), Breiten (int16), je Zeichen x, y, Breite und Höhe
+    # der Bitmap relativ zu Stift bzw. Grundlinie (4x int16), Anfang der Bitmap (uint32, n+1 Einträge),
+    # Bitmaps (zeilenweise, je Zeile (Breite+7)//8 Bytes, höchstwertiges Bit links)
+    codepoints = array("I", sorted(font.glyphs))
+    widths = array("h")
+    boxes = array("h")
+    offsets = array("I", [0])
+    bitmap = bytearray()
+    for cp in codepoints:
+        _g = font.glyphs[cp]
+        widths.append(_g.device_width)
+        if _g.pixels:
+            x0 = min(dx for dx, dy in _g.pixels)
+            y0 = min(dy for dx, dy in _g.pixels)
+            w = max(dx for dx, dy in _g.pixels) - x0 + 1
+            h = max(dy for dx, dy in _g.pixels) - y0 + 1
+            rowbytes = (w + 7) // 8
+            _bits = bytearray(rowbytes * h)
+            for dx, dy in _g.pixels:
+                _c = dx - x0
+                _bits[(dy - y0) * rowbytes + _c // 8] |= 0x80 >> (_c % 8)
+            bitmap += _bits
+        else:
+            x0 = y0 = w = h = 0
+        boxes.extend((x0, y0, w, h))
+        offsets.append(len(bitmap))
+    return b"".join((_header.pack(MAGIC, VERSION, font.height, font.baseline, len(codepoints), len(bitmap)),
+                     _tobytes(codepoints), _tobytes(widths), _tobytes(boxes), _tobytes(offsets), bytes(bitmap)))
+
+
+class CompiledFont:
+    # gleiche Schnittstelle wie BDFFont (glyph, character_width, text_width), Glyph-Objekte werden
+    # erst bei Bedarf aus den Bitmaps erzeugt, Breiten kommen direkt aus der Tabelle
+    __slots__ = ("path", "height", "baseline", "codepoints", "_widths", "_boxes", "_offsets", "_bitmap", "_index", "_glyphs")
+
+    def __init__(self, data: Any, path: str):
+        _data = memoryview(data)
+        magic, version, self.height, self.baseline, n, bitmaplen = _header.unpack_from(_data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a compiled font of version {VERSION}")
+        self.path = path
+        _o = _header.size
+        self.codepoints = _array("I", _data[_o:_o + 4*n])
+        _o += 4*n
+        self._widths = _array("h", _data[_o:_o + 2*n])
+        _o += 2*n
+        self._boxes = _array("h", _data[_o:_o + 8*n])
+        _o += 8*n
+        self._offsets = _array("I", _data[_o:_o + 4*(n+1)])
+        _o += 4*(n+1)
+        self._bitmap = bytes(_data[_o:_o + bitmaplen])
+        if len(self._bitmap) != bitmaplen:
+            raise ValueError(f"{path}: compiled font is truncated")
+        self._index: Dict[int, int] = dict(zip(self.codepoints, range(n)))
+        self._glyphs: Dict[int, Glyph] = {}
+
+    def widths(self) -> Iterator[Tuple[int, int]]:
+        # (Codepoint, Breite) aller vorhandenen Zeichen, z. B. für Breitentabellen
+        return zip(self.codepoints, self._widths)
+
+    def _makeglyph(self, i: int) -> Glyph:
+        x0, y0, w, h = self._boxes[4*i:4*i + 4]
+        rowbytes = (w + 7) // 8
+        _o = self._offsets[i]
+        _bitmap = self._bitmap
+        pixels = tuple((x0 + _c, y0 + _r) for _r in range(h) for _c in range(w)
+                       if _bitmap[_o + _r*rowbytes + _c // 8] & (0x80 >> (_c % 8)))
+        return Glyph(device_width=self._widths[i], pixels=pixels)
+
+    def glyph(self, cp: int) -> Optional[Glyph]:
+        _g = self._glyphs.get(cp)
+        if _g is None:
+            i = self._index.get(cp)
+            if i is None:
+                i = self._index.get(REPLACEMENT_CHARACTER)
+                if i is None:
+                    return None
+            _g = self._glyphs[cp] = self._makeglyph(i)
+        return _g
+
+    def character_width(self, cp: int) -> int:
+        # wie graphics.Font.CharacterWidth: -1 wenn nicht vorhanden, ohne Ersatzzeichen
+        i = self._index.get(cp)
+        return -1 if i is None else self._widths[i]
+
+    def text_width(self, text: str) -> int:
+        _index = self._index
+        _widths = self._widths
+        fallback = _index.get(REPLACEMENT_CHARACTER)
+        width = 0
+        for c in text:
+            i = _index.get(ord(c), fallback)
+            if i is not None:
+                width += _widths[i]
+        return width
+
+
+def _compile_cached(path: str) -> CompiledFont:
+    with open(path, "rb") as f:
+        raw = f.read()
+    cachepath = os_path.join(cachedir, f"{sha256(raw).hexdigest()}.bdfc") if cachedir else None
+    if cachepath is not None:
+        try:
+            with open(cachepath, "rb") as f:
+                return CompiledFont(f.read(), path)
+        except (OSError, ValueError):
+            pass
+    data = compile_font(_parse(raw.decode("utf-8", errors="replace").splitlines(), path))
+    if cachepath is not None:
+        # Cache ist optional, z. B. bei schreibgeschütztem Verzeichnis wird jedes Mal kompiliert
+        try:
+            makedirs(cachedir, exist_ok=True)
+            with open(f"{cachepath}.tmp", "wb") as f:
+                f.write(data)
+            replace(f"{cachepath}.tmp", cachepath)
+        except OSError:
+            pass
+    return CompiledFont(data, path)
+
+
+_loaded: Dict[str, CompiledFont] = {}
+
+
+def load(path: str) -> CompiledFont:
+    _key = os_path.abspath(path)
+    font = _loaded.get(_key)
+    if font is None:
+        font = _loaded[_key] = _compile_cached(path)
+    return font
+
+
+def provide(path: str, font: CompiledFont) -> None:
+    # bereits anderweitig (z. B. aus bundle) geladene Daten, load() parst die Datei dann nicht mehr
+    _loaded[os_path.abspath(path)] = font
+
+
+_fontpaths: Dict[Any, str] = {}
+
+
+def register(font: Any, path: str) -> None:
+    _fontpaths[font] = path
+
+
+def fontdata(font: Any) -> Optional[CompiledFont]:
+    # BDF-Daten zu einem (mit drawstuff.loadfont geladenen) graphics.Font
+    path = _fontpaths.get(font)
+    if path is None:
+        return None
+    return load(path)
+
+
+def draw_text(pixels: Any, size: Tuple[int, int], font: Union[BDFFont, CompiledFont], x: int, y: int, color: Tuple[int, int, int], text: str) -> int:
+    # pixels: z. B. PIL PixelAccess; gibt wie graphics.DrawText die Breite zurück
+    w, h = size
+    start_x = x
+    for c in text:
+        _g = font.glyph(ord(c))
+        if _g is None:
+            continue
+        for dx, dy in _g.pixels:
+            _px, _py = x + dx, y + dy
+            if 0 <= _px < w and 0 <= _py < h:
+                pixels[_px, _py] = color
+        x += _g.device_width
+    return x - start_x
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# Vorkompilierte Ressourcen: alle Bilder aus res/ppm (als RGB-Rohdaten), alle Schriften aus res/bdf
+# (kompiliert, siehe bdf.compile_font) und eingefärbte Varianten der weißen Symbole in einer Datei, die per mmap geöffnet wird.
+# Die Datei enthält einen Hash über den Inhalt von res/ und wird neu erzeugt, sobald sich dort etwas ändert.
+#   python -m dm.bundle [res/] [res.bundle] [r,g,b ...]
+from hashlib import sha256
+from json import dumps, loads
+from mmap import ACCESS_READ, mmap
+from os import listdir, path, replace, walk
+from struct import Struct, error as struct_error
+from sys import argv
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from PIL import Image
+
+from . import bdf
+from .backend import graphics
+from .drawstuff import colorppm, seed_tinted
+
+MAGIC = b"DMRB"
+VERSION = 2
+_header = Struct("<4sHI")
+
+_RGB = Tuple[int, int, int]
+
+
+def reshash(resources_dir: str) -> str:
+    _hash = sha256()
+    for _dir, _dirs, _files in sorted(walk(resources_dir)):
+        _dirs.sort()
+        for _name in sorted(_files):
+            _path = path.join(_dir, _name)
+            _hash.update(path.relpath(_path, resources_dir).encode())
+            with open(_path, "rb") as f:
+                _hash.update(f.read())
+    return _hash.hexdigest()
+
+
+def _files(resources_dir: str, subdir: str, ext: str) -> List[str]:
+    _dir = path.join(resources_dir, subdir)
+    if not path.isdir(_dir):
+        return []
+    return sorted(f"{subdir}/{_name}" for _name in listdir(_dir) if _name.endswith(ext))
+
+
+def build(resources_dir: str, outpath: str, tints: Iterable[_RGB] = ()) -> None:
+    # tints: Farben, in denen alle weißen Symbole (white-*.ppm) vorab eingefärbt werden
+    tints = sorted(set(tuple(_t) for _t in tints))
+    index: Dict[str, list] = {"images": {}, "fonts": {}, "tinted": []}
+    blobs: List[bytes] = []
+    offset = 0
+
+    def _add(data: bytes) -> Tuple[int, int]:
+        nonlocal offset
+        blobs.append(data)
+        offset += len(data)
+        return offset - len(data), len(data)
+
+    images: Dict[str, Image.Image] = {}
+    for _name in _files(resources_dir, "ppm", ".ppm"):
+        _image = images[_name] = Image.open(path.join(resources_dir, _name)).convert("RGB")
+        index["images"][_name] = [*_add(_image.tobytes()), *_image.size]
+    for _name in _files(resources_dir, "bdf", ".bdf"):
+        index["fonts"][_name] = list(_add(bdf.compile_font(bdf.parse_bdf(path.join(resources_dir, _name)))))
+    for _name, _image in images.items():
+        if path.basename(_name).startswith("white-"):
+            for _t in tints:
+                _tinted = colorppm(_image, graphics.Color(*_t))
+                index["tinted"].append([_name, *_t, *_add(_tinted.tobytes())])
+
+    header = dumps({"version": VERSION, "reshash": reshash(resources_dir), "tints": tints, **index}).encode()
+    _tmp = f"{outpath}.tmp"
+    with open(_tmp, "wb") as f:
+        f.write(_header.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for _blob in blobs:
+            f.write(_blob)
+    replace(_tmp, outpath)
+
+
+class ResourceBundle:
+    def __init__(self, bundlepath: str, resources_dir: str):
+        self.resources_dir = resources_dir
+        self._images: Dict[str, Image.Image] = {}
+        self._tinted: Dict[str, List[Tuple[_RGB, int, int]]] = {}
+        self._file = open(bundlepath, "rb")
+        try:
+            # leere Datei: ValueError von mmap
+            self._mm = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        try:
+            self._load(bundlepath)
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self, bundlepath: str) -> None:
+        # alle Fehler einer abgeschnittenen oder fremden Datei als ValueError, siehe open_bundle
+        try:
+            magic, version, headerlen = _header.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("wrong magic or version")
+            self._base = _header.size + headerlen
+            if self._base > len(self._mm):
+                raise ValueError("header exceeds file")
+            self.header = loads(self._mm[_header.size:self._base])
+            ends = [offset + length for offset, length, _w, _h in self.header["images"].values()]
+            ends += [offset + length for offset, length in self.header["fonts"].values()]
+            for _name, _r, _g, _b, offset, length in self.header["tinted"]:
+                self._tinted.setdefault(_name, []).append(((_r, _g, _b), offset, length))
+                ends.append(offset + length)
+            if self._base + max(ends, default=0) > len(self._mm):
+                raise ValueError("blobs exceed file")
+        except (struct_error, KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"{bundlepath}: not a resource bundle of version {VERSION} ({e})") from e
+
+    def close(self) -> None:
+        self._images.clear()
+        self._mm.close()
+        self._file.close()
+
+    def _blob(self, offset: int, length: int) -> memoryview:
+        return memoryview(self._mm)[self._base + offset:self._base + offset + length]
+
+    def image(self, name: str) -> Image.Image:
+        # name relativ zu res/, z. B. "ppm/white-min.ppm"; für einen Namen immer dasselbe Objekt,
+        # dessen vorab eingefärbte Varianten gleich im Cache von drawstuff.tinted landen
+        _image = self._images.get(name)
+        if _image is None:
+            _entry = self.header["images"].get(name)
+            if _entry is None:
+                _image = Image.open(path.join(self.resources_dir, name))
+            else:
+                offset, length, width, height = _entry
+                _image = Image.frombuffer("RGB", (width, height), self._blob(offset, length), "raw", "RGB", 0, 1)
+            self._images[name] = _image
+            for _rgb, offset, length in self._tinted.get(name, ()):
+                seed_tinted(_image, _rgb, Image.frombuffer("RGB", _image.size, self._blob(offset, length), "raw", "RGB", 0, 1))
+        return _image
+
+    def provide_fonts(self) -> None:
+        # kompilierte Schriften an bdf übergeben, bevor sie mit drawstuff.loadfont geladen werden
+        for _name, (offset, length) in self.header["fonts"].items():
+            _path = path.join(self.resources_dir, _name)
+            bdf.provide(_path, bdf.CompiledFont(self._blob(offset, length), _path))
+
+
+def open_bundle(bundlepath: str, resources_dir: str, tints: Iterable[_RGB] = ()) -> Optional[ResourceBundle]:
+    # vorhandenes Bundle verwenden, wenn es zu res/ und den Farben passt, sonst neu erzeugen
+    tints = [list(_t) for _t in tints]
+    try:
+        bundle: Optional[ResourceBundle] = ResourceBundle(bundlepath, resources_dir)
+        if bundle.header["reshash"] != reshash(resources_dir) or any(_t not in bundle.header["tints"] for _t in tints):
+            logger.info(f"resource bundle {bundlepath} is outdated, rebuilding")
+            bundle.close()
+            bundle = None
+    except (OSError, ValueError) as e:
+        logger.info(f"resource bundle {bundlepath} not usable ({e}), building")
+        bundle = None
+    if bundle is None:
+        try:
+            build(resources_dir, bundlepath, tints)
+            bundle = ResourceBundle(bundlepath, resources_dir)
+        except OSError as e:
+            logger.warning(f"could not build resource bundle {bundlepath}: {e}")
+            return None
+    return bundle
+
+
+if __name__ == "__main__":
+    _resources_dir = argv[1] if len(argv) > 1 else "res"
+    _out = argv[2] if len(argv) > 2 else "res.bundle"
+    build(_resources_dir, _out, [tuple(int(_c) for _c in _arg.split(",")) for _arg in argv[3:]])
+    print(f"{_out}: {path.getsize(_out)} bytes")
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Begrenzte Zwischenspeicher (LRU) mit Zählern, damit sich im Betrieb (--frame-stats) prüfen lässt,
+# ob die Größen passen. Alle mit cached() angelegten Caches sind unter ihrem Namen in caches eingetragen.
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_missing = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: Dict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.entries.get(key, _missing)
+        if value is _missing:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self.entries) > max(0, self.maxsize):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.entries), "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+caches: Dict[str, LRUCache] = {}
+
+
+def cached(name: str, maxsize: int, key: Optional[Callable[..., Hashable]] = None) -> Callable[[Callable], Callable]:
+    # wie functools.lru_cache, aber mit Namen und Zählern; key bildet aus den Argumenten den Schlüssel
+    # (Standard: die Positionsargumente), die Funktion selbst bekommt immer die Originalargumente
+    cache = caches[name] = LRUCache(maxsize)
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            _key = key(*args, **kwargs) if key is not None else args
+            value = cache.get(_key, _missing)
+            if value is _missing:
+                value = fn(*args, **kwargs)
+                cache.put(_key, value)
+            return value
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        return wrapper
+    return decorator
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -7,7 +7,6 @@ from datetime import datetime, timedelta, timezone
 from enum import Enum
 from json import dumps as json_dumps, loads as json_loads
 from re import compile as re_compile
-from requests import get
 from requests.exceptions import RequestException
 from subprocess import call
 from time import asctime, sleep
@@ -16,6 +15,8 @@ import xml.etree.ElementTree as ET
 
 from loguru import logger
 
+from .recording import get
+
 
 @dataclass
 class Meldung:
@@ -444,16 +445,14 @@ def getkvbmonitor(STATION_ID: int, tz: timezone, limit: int = 0,
     return departures, [], {}
 
 
-def getrssfeed(url: str, timeout: Union[int, float], tz: timezone, symbol: str = "info",
+def readrssxml(root: ET.Element, tz: timezone, symbol: str = "info",
         limit: int = 0, limit_timedelta: timedelta = timedelta(),
         filter_categories: Optional[Collection[str]] = None, output_date: bool = False, message_priority: Optional[int] = None) -> type_depmsgdata:
     # bisher nicht implementiert: Ausgabe von description oder content:encoded
     # (ist aber ohne weitere Verarbeitung oft ungeeignet für diese Darstellungsart)
     messages: List[Meldung] = []
     nowtime = datetime.now(tz)
-    r = get(url, timeout=timeout)
-    r.raise_for_status()
-    for item in ET.fromstring(r.content).iter('item'):
+    for item in root.iter('item'):
         _pubDate = datetime.strptime(item.find('pubDate').text, "%a, %d %b %Y %H:%M:%S %z")
         if limit_timedelta and nowtime - _pubDate > limit_timedelta:
             continue
@@ -467,13 +466,21 @@ def getrssfeed(url: str, timeout: Union[int, float], tz: timezone, symbol: str =
     return [], messages, []
 
 
+def getrssfeed(url: str, timeout: Union[int, float], tz: timezone, symbol: str = "info",
+        limit: int = 0, limit_timedelta: timedelta = timedelta(),
+        filter_categories: Optional[Collection[str]] = None, output_date: bool = False, message_priority: Optional[int] = None) -> type_depmsgdata:
+    r = get(url, timeout=timeout)
+    r.raise_for_status()
+    return readrssxml(ET.fromstring(r.content), tz, symbol, limit, limit_timedelta, filter_categories, output_date, message_priority)
+
+
 def _nina_out_time(dt: datetime, format: str, format_onlydate: str, tz: timezone, format_nodate: Optional[str] = None, pair_first: Optional[datetime] = None):
     if format_nodate and pair_first and dt.date() == pair_first.date():
         return dt.strftime(format_nodate)
     _today = datetime.now(tz).date()
     return dt.strftime(format).replace(_today.strftime(format_onlydate), "Heute") if dt.date() == _today else dt.strftime(format)
 
-def getnina(url: str, ags: str, timeout: Union[int, float], tz: timezone, symbol: str = "warn",
+def readninajson(warnings: List[Dict[str, Any]], tz: timezone, symbol: str = "warn",
         limit: int = 0, message_priority: Optional[int] = None,
         ignore_msgType: Optional[Collection[str]] = None,
         ignore_severity: Optional[Collection[str]] = None,
@@ -484,9 +491,6 @@ def getnina(url: str, ags: str, timeout: Union[int, float], tz: timezone, symbol
     _time_out_onlydate = '%d.%m'
     _time_out_nodate = '%H:%M'
     _time_out = f"{_time_out_onlydate} {_time_out_nodate}"
-    r = get(f"{url}{ags}.json", timeout=timeout)
-    r.raise_for_status()
-    warnings = r.json()
     for warning in warnings:
         if ignore_id and warning['id'] in ignore_id: continue
         payload = warning['payload']
@@ -522,6 +526,16 @@ def getnina(url: str, ags: str, timeout: Union[int, float], tz: timezone, symbol
     return [], messages, []
 
 
+def getnina(url: str, ags: str, timeout: Union[int, float], tz: timezone, symbol: str = "warn",
+        limit: int = 0, message_priority: Optional[int] = None,
+        ignore_msgType: Optional[Collection[str]] = None,
+        ignore_severity: Optional[Collection[str]] = None,
+        ignore_id: Optional[Collection[str]] = None) -> type_depmsgdata:
+    r = get(f"{url}{ags}.json", timeout=timeout)
+    r.raise_for_status()
+    return readninajson(r.json(), tz, symbol, limit, message_priority, ignore_msgType, ignore_severity, ignore_id)
+
+
 def _json_messages(json_msg: List[Dict[str, Any]]) -> List[Meldung]:
     # priority not correctly implemented for now
     messages = [
@@ -1,20 +1,51 @@
 # -*- coding: utf-8 -*-
 import random
-from rgbmatrix import graphics
+
+import numpy as np
+from PIL import Image
+
+from .backend import graphics
+
+from . import bdf
+from .caches import LRUCache, caches
+from .sprites import drawtext_vertical
 
 
 def clockstr_tt(tt):
     return f"{tt.tm_hour:02}:{tt.tm_min:02}"
 
 
+def loadfont(path):
+    font = graphics.Font()
+    font.LoadFont(path)
+    bdf.register(font, path)
+    return font
+
+
 def colorppm(ppm, color, fromcolor=(255, 255, 255)):
-    newppm = ppm.copy()
-    data = newppm.load()
-    for x in range(newppm.size[0]):
-        for y in range(newppm.size[1]):
-            if data[x, y] == fromcolor:
-                data[x, y] = (color.red, color.green, color.blue)
-    return newppm
+    # alle Pixel in fromcolor werden zu color
+    data = np.array(ppm.convert("RGB"))
+    data[(data == fromcolor).all(axis=2)] = (color.red, color.green, color.blue)
+    return Image.fromarray(data)
+
+
+_tinted = caches["tinted"] = LRUCache(64)
+
+
+def tinted(ppm, color, fromcolor=(255, 255, 255)):
+    # colorppm, die Ergebnisse werden für beliebige Farben (z. B. Linienfarben) nach Bedarf erzeugt
+    # und begrenzt zwischengespeichert; das Original wird mitgespeichert, damit die id gültig bleibt
+    _key = (id(ppm), color.red, color.green, color.blue, fromcolor)
+    _entry = _tinted.get(_key)
+    if _entry is None or _entry[0] is not ppm:
+        _entry = (ppm, colorppm(ppm, color, fromcolor))
+        _tinted.put(_key, _entry)
+    return _entry[1]
+
+
+def seed_tinted(ppm, rgb, image, fromcolor=(255, 255, 255)):
+    # bereits eingefärbtes Bild (z. B. aus bundle) für tinted() hinterlegen
+    _tinted.put((id(ppm), *rgb, fromcolor), (ppm, image))
 
 
 def drawppm_topcentered(canvas, ppm, cx, ty, unsafe=True, transp=False):
@@ -56,14 +87,29 @@ def drawsecpixels(canvas, coords, sec, maincolor, addcolor=None, offcolor=graphi
 
 
 def drawverticaltime(canvas, font, x, y, color, hour, minute, sec=None, sec_mainc=None, sec_addc=None, sec_offc=graphics.Color()):
-    y = 1 + graphics.VerticalDrawText(canvas, font, x, y, color, f"{hour:02}")
+    y = 1 + drawtext_vertical(canvas, font, x, y, color, f"{hour:02}")
     if sec is not None:
         drawsecpixels(canvas, ((x+2,y), (x+2,y+1), (x+1,y+1), (x+1,y)), sec, maincolor=(sec_mainc or color), addcolor=sec_addc, offcolor=sec_offc)
     y += 1 + font.height + 1
-    y += graphics.VerticalDrawText(canvas, font, x, y, color, f"{minute:02}")
+    y += drawtext_vertical(canvas, font, x, y, color, f"{minute:02}")
+
+
+class _BorderCanvas:
+    # nimmt die SetPixel-Aufrufe für die Randzeilen auf: y_min, y_min+1 oben und y_max-1, y_max unten
+    def __init__(self, x_min, x_max, y_min, y_max):
+        self.x_min = x_min
+        self.y_min = y_min
+        self.y_max = y_max
+        self.buffer = np.zeros((4, x_max+1-x_min, 3), dtype=np.uint8)
 
+    def SetPixel(self, x, y, red, green, blue):
+        row = y-self.y_min if y <= self.y_min+1 else y-self.y_max+3
+        x -= self.x_min
+        if 0 <= row < 4 and 0 <= x < self.buffer.shape[1]:
+            self.buffer[row, x] = (int(red), int(green), int(blue))
 
-def makechristmasfn(maxrgb, randspeed, ptrgb, ptspeed, ptlen, ptscale):
+
+def makechristmasfn(maxrgb, randspeed, ptrgb, ptspeed, ptlen, ptscale, randcycle=16):
     ## Beispielangaben:
     # randspeed = 8
     # maxrgb = (130, 150, 35)
@@ -73,20 +119,21 @@ def makechristmasfn(maxrgb, randspeed, ptrgb, ptspeed, ptlen, ptscale):
     # ptscale = 0.8
     # ptrgb = (77, 65, 0)
     ## ptrgb = (153, 130, 0)
-    def drawchristmas(canvas, x_min, x_max, y_min, y_max, i):
+    # Die Animation läuft in einem festen Zyklus: ein Durchlauf des Lichtpunkts (ohne Lichtpunkt randcycle Zufallszustände).
+    # Jedes Bild des Zyklus wird beim ersten Auftreten einmal berechnet, danach wird pro Bild nur oben und unten
+    # ein fertiger Streifen gezeichnet. Gleiche Bilder werden nur einmal gespeichert; schwarze Pixel werden nicht übernommen (transp).
+    def drawframe(canvas, x_min, x_max, y_min, y_max, ptstep, rand):
         l = x_max+1-x_min
         bbness = 1
         if ptspeed:
-            pt = x_min+((i//ptspeed)%(x_max-x_min))
+            pt = x_min+ptstep
             # canvas.SetPixel(pt, y_max-4, 255, 255, 255)
-        if randspeed:
-            random.seed(i//randspeed)
         for x in range(x_min, x_max+1):
             if ptspeed and ptscale:
                 dist = abs(x-pt)
                 bbness = (min(dist/l, (l-dist)/l))*ptscale
                 bbness = max(0, min(bbness, 1))
-            rv, gv, bv = (maxrgb[_]*bbness*((not randspeed) or random.triangular(0.2, 1, 0.6)) for _ in (0, 1, 2))
+            rv, gv, bv = (maxrgb[_]*bbness*((not randspeed) or rand.triangular(0.2, 1, 0.6)) for _ in (0, 1, 2))
             # % usw.. anpassen/?
             canvas.SetPixel(x, y_min+x%2, rv*bool(x%5), gv*(not x%3), bv*(not x%5))
             canvas.SetPixel(x_min+x_max-x, y_max-x%2, rv*bool(x%5), gv*(not x%3), bv*(not x%5))
@@ -97,4 +144,28 @@ def makechristmasfn(maxrgb, randspeed, ptrgb, ptspeed, ptlen, ptscale):
                 canvas.SetPixel(x_min+x%(tmp), y_min+1, ptrgb[0]*(not x%2), ptrgb[1]*(not x%2), ptrgb[2]*(not x%2))
                 canvas.SetPixel(x_min+(x_max-x)%(tmp), y_max-1, ptrgb[0]*bool(x%2), ptrgb[1]*bool(x%2), ptrgb[2]*bool(x%2))
                 canvas.SetPixel(x_min+(x_max-x)%(tmp), y_max, ptrgb[0]*(not x%2), ptrgb[1]*(not x%2), ptrgb[2]*(not x%2))
+
+    def makeframe(x_min, x_max, y_min, y_max, key):
+        # oberer und unterer Streifen für key (Position des Lichtpunkts, Zufallszustand)
+        border = _BorderCanvas(x_min, x_max, y_min, y_max)
+        drawframe(border, x_min, x_max, y_min, y_max, key[0], random.Random(key[1]))
+        return Image.fromarray(border.buffer[:2], "RGB"), Image.fromarray(border.buffer[2:], "RGB")
+
+    # je Bereich die bereits berechneten Bilder
+    cycles = {}
+
+    def drawchristmas(canvas, x_min, x_max, y_min, y_max, i):
+        _bounds = (x_min, x_max, y_min, y_max)
+        frames = cycles.get(_bounds)
+        if frames is None:
+            frames = cycles[_bounds] = {}
+        period = ptspeed*(x_max-x_min) if ptspeed else (randspeed*randcycle if randspeed else 1)
+        _i = i % period
+        _key = ((_i//ptspeed) % (x_max-x_min) if ptspeed else 0, _i//randspeed if randspeed else 0)
+        _frame = frames.get(_key)
+        if _frame is None:
+            _frame = frames[_key] = makeframe(*_bounds, _key)
+        top, bottom = _frame
+        canvas.SetImage(top, x_min, y_min, True, True)
+        canvas.SetImage(bottom, x_min, y_max-1, True, True)
     return drawchristmas
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Ausgabe der gerenderten Bilder außerhalb der Matrix (--write-ppm).
+# Die Hauptschleife kopiert nur das Bild, geschrieben wird in einem eigenen Thread.
+from os import getpid, path, replace, stat
+from re import compile as re_compile
+from stat import S_ISFIFO
+from string import Formatter
+from tempfile import gettempdir
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from .backend import FrameCanvas
+
+_ppmheader = re_compile(rb"P6\s+(\d+)\s+(\d+)\s+(\d+)\s")
+
+
+def scratchpath(name: str) -> str:
+    # für canvas.ppm(), möglichst im Arbeitsspeicher
+    _dir = "/dev/shm" if path.isdir("/dev/shm") else gettempdir()
+    return path.join(_dir, f"dm_{name}_{getpid()}.ppm")
+
+
+def frame_rgb(canvas: FrameCanvas, scratch: str) -> Tuple[int, int, bytes]:
+    # Breite, Höhe und RGB-Daten (zeilenweise) des aktuellen Bildes
+    buffer = getattr(canvas, "buffer", None)
+    if buffer is not None:
+        # headless: direkt aus dem NumPy-Bildspeicher
+        return canvas.width, canvas.height, buffer.tobytes()
+    # rgbmatrix (Fork): nur über canvas.ppm() erreichbar
+    canvas.ppm(scratch)
+    with open(scratch, "rb") as f:
+        data = f.read()
+    _m = _ppmheader.match(data)
+    if _m is None:
+        raise ValueError(f"unexpected output of canvas.ppm in {scratch}")
+    return int(_m.group(1)), int(_m.group(2)), data[_m.end():]
+
+
+def ppm_bytes(width: int, height: int, rgb: bytes) -> bytes:
+    return b"P6 %d %d 255\n" % (width, height) + rgb
+
+
+def _check_template(filepath: str) -> bool:
+    # ob filepath ein Platzhalter {n} enthält; als einziger Platzhalter erlaubt, andere Klammern als {{ }}.
+    # Sonst ValueError, damit nicht erst der Thread beim ersten Bild daran scheitert
+    try:
+        fields = {_field for _text, _field, _spec, _conv in Formatter().parse(filepath) if _field is not None}
+        if fields - {"n"}:
+            raise ValueError(f"only {{n}} is allowed, not {', '.join(repr(_f) for _f in sorted(fields - {'n'}))}")
+        filepath.format(n=0)
+    except (ValueError, IndexError, KeyError) as e:
+        raise ValueError(f"invalid file name template {filepath!r}: {e}") from e
+    return bool(fields)
+
+
+class PPMWriter:
+    # Schreibt höchstens max_rate Bilder pro Sekunde nach filepath. Reguläre Dateien werden
+    # über eine temporäre Datei und rename ersetzt, Leser sehen also nie halbe Bilder.
+    # Ist filepath eine FIFO, wird direkt hineingeschrieben (blockiert dann nur den Thread).
+    # Ist der Thread noch beschäftigt, ersetzt ein neues Bild das wartende (dropped).
+    # Enthält filepath {n} (z. B. frames/{n:08}.ppm), wird jedes Bild in eine eigene Datei geschrieben (siehe _check_template).
+    def __init__(self, filepath: str, max_rate: float = 10.0, clock: Callable[[], float] = monotonic):
+        self.filepath = filepath
+        self.min_interval = 1 / max_rate if max_rate > 0 else 0.0
+        self.clock = clock
+        self.numbered = _check_template(filepath)
+        # ohne {n} nur {{ }} auflösen
+        self._path = filepath.format(n=0)
+        self.fifo = not self.numbered and path.exists(self._path) and S_ISFIFO(stat(self._path).st_mode)
+
+        self._cond = Condition()
+        self._pending: Optional[bytes] = None
+        self._thread: Optional[Thread] = None
+        self._closed = False
+        self._next = 0.0
+
+        self.submitted = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+
+    def due(self) -> bool:
+        # ob das nächste Bild übernommen würde (max_rate), sonst wird es als skipped gezählt
+        now = self.clock()
+        if now < self._next:
+            self.skipped += 1
+            return False
+        self._next = now + self.min_interval
+        return True
+
+    def submit(self, frame: Tuple[int, int, bytes]) -> None:
+        # frame wie von frame_rgb, nach due() aufrufen; so wird das Bild nur einmal aus dem Canvas gelesen,
+        # auch wenn es noch anderweitig (z. B. FrameRing) ausgegeben wird
+        data = ppm_bytes(*frame)
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = data
+            self.submitted += 1
+            self._cond.notify()
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="ppmwriter", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                data, self._pending = self._pending, None
+            try:
+                self._write(data)
+            except OSError as e:
+                self.errors += 1
+                if self.errors == 1 or not self.errors % 1000:
+                    logger.warning(f"writing {self.filepath} failed ({self.errors} times): {e}")
+            else:
+                self.written += 1
+
+    def _write(self, data: bytes) -> None:
+        if self.fifo:
+            # pro Bild öffnen und schließen, Leser wie ppmtest.py lesen jeweils bis EOF
+            with open(self._path, "wb") as f:
+                f.write(data)
+            return
+        _target = self.filepath.format(n=self.written) if self.numbered else self._path
+        _tmp = f"{_target}.{getpid()}.tmp"
+        with open(_tmp, "wb") as f:
+            f.write(data)
+        replace(_tmp, _target)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {"submitted": self.submitted, "skipped": self.skipped, "dropped": self.dropped, "written": self.written, "errors": self.errors}
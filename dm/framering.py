@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Ringpuffer für gerenderte Bilder in einer per mmap geteilten Datei (z. B. /dev/shm/dm_frames),
+# damit externe Anzeigen (ppmtools/ppmtest.py) ohne Dateisystemzugriffe das neueste Bild lesen können.
+#
+# Aufbau (little endian):
+#   Kopf, 32 Bytes:  magic "DMFR", version, width, height, channels (3, RGB), slots (je uint32), seq (uint64)
+#   slots x Slot:    seq (uint64), danach width*height*channels Bytes, auf 8 Bytes aufgefüllt
+# seq im Kopf ist die Nummer des zuletzt vollständig geschriebenen Bildes, es liegt in Slot seq % slots.
+# Während ein Slot beschrieben wird, steht dort seq 0; Leser prüfen die Slot-seq vor und nach dem Lesen.
+from mmap import ACCESS_READ, mmap
+from os import O_CREAT, O_RDWR, close as os_close, ftruncate, open as os_open, path
+from struct import Struct
+from typing import Optional, Tuple
+
+MAGIC = b"DMFR"
+VERSION = 1
+_header = Struct("<4sIIIIIQ")
+_seq = Struct("<Q")
+_seq_offset = _header.size - _seq.size
+
+
+def _framesize(width: int, height: int, channels: int) -> int:
+    _size = width * height * channels
+    return _size + (-_size) % 8
+
+
+def _size(width: int, height: int, channels: int, slots: int) -> int:
+    return _header.size + slots * (_seq.size + _framesize(width, height, channels))
+
+
+class FrameRing:
+    def __init__(self, filepath: str, width: int, height: int, slots: int = 3, channels: int = 3):
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots")
+        self.filepath = filepath
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.slots = slots
+        self.framebytes = width * height * channels
+        self._slotsize = _seq.size + _framesize(width, height, channels)
+
+        _fd = os_open(filepath, O_RDWR | O_CREAT, 0o644)
+        try:
+            ftruncate(_fd, _size(width, height, channels, slots))
+            self._mm = mmap(_fd, _size(width, height, channels, slots))
+        finally:
+            os_close(_fd)
+        self.seq = 0
+        _header.pack_into(self._mm, 0, MAGIC, VERSION, width, height, channels, slots, 0)
+
+    def publish(self, data: bytes) -> int:
+        if len(data) != self.framebytes:
+            raise ValueError(f"frame has {len(data)} bytes, expected {self.framebytes}")
+        seq = self.seq + 1
+        _offset = _header.size + (seq % self.slots) * self._slotsize
+        _seq.pack_into(self._mm, _offset, 0)
+        self._mm[_offset + _seq.size:_offset + _seq.size + self.framebytes] = data
+        _seq.pack_into(self._mm, _offset, seq)
+        _seq.pack_into(self._mm, _seq_offset, seq)
+        self.seq = seq
+        return seq
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class FrameRingReader:
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._mm = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, version, self.width, self.height, self.channels, self.slots, _ = _header.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{filepath} is not a frame ring (version {VERSION})")
+        self.framebytes = self.width * self.height * self.channels
+        self._slotsize = _seq.size + _framesize(self.width, self.height, self.channels)
+        if len(self._mm) < _size(self.width, self.height, self.channels, self.slots):
+            self._mm.close()
+            raise ValueError(f"{filepath} is truncated")
+
+    @staticmethod
+    def check(filepath: str) -> bool:
+        # ob filepath ein Ringpuffer ist (ohne Ausnahme)
+        try:
+            with open(filepath, "rb") as f:
+                return f.read(len(MAGIC)) == MAGIC and path.getsize(filepath) >= _header.size
+        except OSError:
+            return False
+
+    def latest_seq(self) -> int:
+        return _seq.unpack_from(self._mm, _seq_offset)[0]
+
+    def latest(self) -> Optional[Tuple[int, memoryview]]:
+        # (seq, Bilddaten) des neuesten Bildes, None wenn noch keins geschrieben wurde oder der Slot
+        # während des Lesens überschrieben wurde. Die Daten sind eine Sicht in den Puffer (keine Kopie),
+        # also nur gültig, bis der Slot wieder beschrieben wird; danach mit valid(seq) prüfen.
+        seq = self.latest_seq()
+        if not seq:
+            return None
+        _offset = _header.size + (seq % self.slots) * self._slotsize
+        if _seq.unpack_from(self._mm, _offset)[0] != seq:
+            return None
+        return seq, memoryview(self._mm)[_offset + _seq.size:_offset + _seq.size + self.framebytes]
+
+    def valid(self, seq: int) -> bool:
+        _offset = _header.size + (seq % self.slots) * self._slotsize
+        return _seq.unpack_from(self._mm, _offset)[0] == seq
+
+    def close(self) -> None:
+        self._mm.close()
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# Ersatz für rgbmatrix ohne Hardware: Bildspeicher als NumPy-Array, Schriften über dm.bdf.
+# Gleiche Aufteilung wie das Original (rgbmatrix, rgbmatrix.core, rgbmatrix.graphics).
+from . import graphics
+from .core import FrameCanvas, RGBMatrix, RGBMatrixOptions
+
+__all__ = ["FrameCanvas", "RGBMatrix", "RGBMatrixOptions", "graphics"]
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from typing import Any, BinaryIO, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+
+class RGBMatrixOptions:
+    def __init__(self):
+        self.hardware_mapping = "regular"
+        self.rows = 32
+        self.cols = 32
+        self.chain_length = 1
+        self.parallel = 1
+        self.row_address_type = 0
+        self.multiplexing = 0
+        self.pwm_bits = 11
+        self.brightness = 100
+        self.pwm_lsb_nanoseconds = 130
+        self.led_rgb_sequence = "RGB"
+        self.pixel_mapper_config = ""
+        self.panel_type = ""
+        self.show_refresh_rate = 0
+        self.limit_refresh_rate_hz = 0
+        self.gpio_slowdown = 1
+        self.disable_hardware_pulsing = False
+        self.inverse_colors = False
+        self.daemon = 0
+        self.drop_privileges = 1
+        self.pixelsvector = False
+
+
+class FrameCanvas:
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.brightness = 100
+        self.pwmBits = 11
+        # Zeilen, Spalten, RGB
+        self.buffer = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def SetPixel(self, x: int, y: int, red: int, green: int, blue: int) -> None:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.buffer[y, x] = (red, green, blue)
+
+    def Fill(self, red: int, green: int, blue: int) -> None:
+        self.buffer[:, :] = (red, green, blue)
+
+    def Clear(self) -> None:
+        self.buffer.fill(0)
+
+    def SetImage(self, image: Image.Image, offset_x: int = 0, offset_y: int = 0, unsafe: bool = True, transp: bool = False) -> None:
+        # transp wie im Fork d3d9/rpi-rgb-led-matrix: schwarze Pixel werden nicht übernommen
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        x0, y0 = max(0, offset_x), max(0, offset_y)
+        x1, y1 = min(self.width, offset_x + image.size[0]), min(self.height, offset_y + image.size[1])
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = np.asarray(image)[y0 - offset_y:y1 - offset_y, x0 - offset_x:x1 - offset_x]
+        dst = self.buffer[y0:y1, x0:x1]
+        if transp:
+            mask = src.any(axis=2)
+            dst[mask] = src[mask]
+        else:
+            dst[:] = src
+
+    def ppm(self, f: Union[str, BinaryIO]) -> None:
+        # wie canvas.ppm im Fork: aktuelles Bild als binäres PPM
+        data = b"P6 %d %d 255\n" % (self.width, self.height) + self.buffer.tobytes()
+        if isinstance(f, str):
+            with open(f, "wb") as _f:
+                _f.write(data)
+        else:
+            f.write(data)
+            f.flush()
+
+    def image(self) -> Image.Image:
+        return Image.fromarray(self.buffer, "RGB")
+
+
+class RGBMatrix:
+    def __init__(self, rows: int = 0, chains: int = 0, parallel: int = 0, options: Optional[RGBMatrixOptions] = None):
+        if options is None:
+            options = RGBMatrixOptions()
+            if rows > 0:
+                options.rows = rows
+            if chains > 0:
+                options.chain_length = chains
+            if parallel > 0:
+                options.parallel = parallel
+        self.options = options
+        # Pixel-Mapper werden nicht nachgebildet
+        self.width = options.cols * options.chain_length
+        self.height = options.rows * options.parallel
+        self.brightness = options.brightness
+        self.pwmBits = options.pwm_bits
+        self.luminanceCorrect = True
+        self.frontbuffer = FrameCanvas(self.width, self.height)
+        self.swaps = 0
+
+    def CreateFrameCanvas(self, *args: Any) -> FrameCanvas:
+        return FrameCanvas(self.width, self.height)
+
+    def SwapOnVSync(self, canvas: FrameCanvas, framerate_fraction: int = 1) -> FrameCanvas:
+        # wie beim Original wird der bisher angezeigte Canvas zum Weiterzeichnen zurückgegeben
+        previous, self.frontbuffer = self.frontbuffer, canvas
+        self.swaps += 1
+        return previous
+
+    def SetPixel(self, x: int, y: int, red: int, green: int, blue: int) -> None:
+        self.frontbuffer.SetPixel(x, y, red, green, blue)
+
+    def Fill(self, red: int, green: int, blue: int) -> None:
+        self.frontbuffer.Fill(red, green, blue)
+
+    def Clear(self) -> None:
+        self.frontbuffer.Clear()
+
+    def SetImage(self, image: Image.Image, offset_x: int = 0, offset_y: int = 0, unsafe: bool = True, transp: bool = False) -> None:
+        self.frontbuffer.SetImage(image, offset_x, offset_y, unsafe, transp)
+
+    def GPIORequestInputs(self, mask: int) -> int:
+        return 0
+
+    def AwaitInputChange(self, timeout_ms: int) -> int:
+        return 0
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Nachbildung von rgbmatrix.graphics (graphics.cc, bdf-font.cc) für dm.headless.core.FrameCanvas
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .. import bdf
+from .core import FrameCanvas
+
+
+class Color:
+    def __init__(self, red: int = 0, green: int = 0, blue: int = 0):
+        self.red = red
+        self.green = green
+        self.blue = blue
+
+    def __repr__(self) -> str:
+        return f"Color({self.red}, {self.green}, {self.blue})"
+
+
+class Font:
+    def __init__(self):
+        self.data: Optional[bdf.CompiledFont] = None
+        self.height = -1
+        self.baseline = 0
+        # je Zeichen die gesetzten Pixel als Arrays (x, y relativ zu Stift/Grundlinie) und die Breite
+        self._glyphs: Dict[int, Optional[Tuple[np.ndarray, np.ndarray, int]]] = {}
+
+    def LoadFont(self, file: str) -> None:
+        try:
+            self.data = bdf.load(file)
+        except OSError:
+            raise Exception(f"Couldn't load font {file}")
+        self.height = self.data.height
+        self.baseline = self.data.baseline
+        self._glyphs = {}
+
+    def CharacterWidth(self, char: int) -> int:
+        if self.data is None:
+            return -1
+        return self.data.character_width(char)
+
+    def _glyph(self, cp: int) -> Optional[Tuple[np.ndarray, np.ndarray, int]]:
+        try:
+            return self._glyphs[cp]
+        except KeyError:
+            pass
+        _g = self.data.glyph(cp) if self.data is not None else None
+        if _g is None:
+            _entry = None
+        else:
+            _pixels = np.array(_g.pixels, dtype=np.intp).reshape(-1, 2)
+            _entry = (_pixels[:, 0], _pixels[:, 1], _g.device_width)
+        self._glyphs[cp] = _entry
+        return _entry
+
+    def DrawGlyph(self, c: FrameCanvas, x: int, y: int, color: Color, char: int) -> int:
+        _entry = self._glyph(char)
+        if _entry is None:
+            return 0
+        xs, ys, width = _entry
+        xs = xs + x
+        ys = ys + y
+        inside = (xs >= 0) & (xs < c.width) & (ys >= 0) & (ys < c.height)
+        c.buffer[ys[inside], xs[inside]] = (color.red, color.green, color.blue)
+        return width
+
+
+def DrawText(c: FrameCanvas, f: Font, x: int, y: int, color: Color, text: str) -> int:
+    start_x = x
+    for char in text:
+        x += f.DrawGlyph(c, x, y, color, ord(char))
+    return x - start_x
+
+
+def VerticalDrawText(c: FrameCanvas, f: Font, x: int, y: int, color: Color, text: str) -> int:
+    start_y = y
+    for char in text:
+        f.DrawGlyph(c, x, y, color, ord(char))
+        y += f.height
+    return y - start_y
+
+
+def _cdiv(a: int, b: int) -> int:
+    # Ganzzahldivision wie in C (Richtung 0)
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def DrawLine(c: FrameCanvas, x0: int, y0: int, x1: int, y1: int, color: Color) -> None:
+    # gleiche Festkommarechnung wie graphics.cc
+    dy, dx = y1 - y0, x1 - x0
+    shift = 0x10
+    if abs(dx) > abs(dy):
+        if x1 < x0:
+            x0, x1, y0, y1 = x1, x0, y1, y0
+        gradient = _cdiv((y1 - y0) << shift, x1 - x0)
+        y = 0x8000 + (y0 << shift)
+        for x in range(x0, x1 + 1):
+            c.SetPixel(x, y >> shift, color.red, color.green, color.blue)
+            y += gradient
+    elif dy != 0:
+        if y1 < y0:
+            x0, x1, y0, y1 = x1, x0, y1, y0
+        gradient = _cdiv((x1 - x0) << shift, y1 - y0)
+        x = 0x8000 + (x0 << shift)
+        for y in range(y0, y1 + 1):
+            c.SetPixel(x >> shift, y, color.red, color.green, color.blue)
+            x += gradient
+    else:
+        c.SetPixel(x0, y0, color.red, color.green, color.blue)
+
+
+def DrawCircle(c: FrameCanvas, x: int, y: int, r: int, color: Color) -> None:
+    # Midpoint-Algorithmus wie graphics.cc
+    radius_error = 1 - r
+    _x, _y = r, 0
+    while _y <= _x:
+        for px, py in ((_x + x, _y + y), (_y + x, _x + y), (-_x + x, _y + y), (-_y + x, _x + y),
+                       (-_x + x, -_y + y), (-_y + x, -_x + y), (_x + x, -_y + y), (_y + x, -_x + y)):
+            c.SetPixel(px, py, color.red, color.green, color.blue)
+        _y += 1
+        if radius_error < 0:
+            radius_error += 2 * _y + 1
+        else:
+            _x -= 1
+            radius_error += 2 * (_y - _x + 1)
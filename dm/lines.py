@@ -1,17 +1,75 @@
 # -*- coding: utf-8 -*-
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from functools import lru_cache
+from itertools import accumulate
 from re import Pattern, match as re_match
 from typing import List, Optional, Callable, Tuple, Dict, Match
 
 from PIL import Image
-from rgbmatrix import graphics
-from rgbmatrix.core import FrameCanvas
 from webcolors import hex_to_rgb
 
-from .drawstuff import clockstr_tt, drawppm_bottomleft, drawppm_bottomright
+from . import bdf
+from .caches import cached
+from .backend import FrameCanvas, graphics
+from .drawstuff import clockstr_tt, drawppm_bottomleft, drawppm_bottomright, tinted
+from .sprites import drawtext, sprites
 from .depdata import Departure, Meldung, MOT, trainMOT
+from .timing import FrameClock
+
+
+@dataclass
+class _ScrollStrip:
+    # alle Elemente einer MultisymbolScrollline nebeneinander als ein Bild (mehr als eine Runde, damit
+    # jeder Ausschnitt am Stück darin liegt). offset ist die Spalte im Bild, die an lx stehen würde.
+    image: Image.Image
+    top: int  # oberste Zeile relativ zu texty
+    period: int
+    # Beginn jedes Elements der ersten Runde, zuletzt period
+    elemstarts: List[int]
+    symbols: List[Optional[Image.Image]]
+    charstarts: List[List[int]]
+    # Ende des Textes (inkl. Abstand nach dem letzten Zeichen) jedes Elements der ersten Runde
+    textstops: List[int]
+    # Symbole und Zeichen in Reihenfolge: Beginn, (laufendes Maximum der) letzte(n) Spalte, die noch
+    # vor rx liegen muss, damit sie gezeichnet werden (wie propscroll, Symbole nur ganz), und
+    # (laufendes Maximum vom) Ende inkl. Abstand nach dem Zeichen
+    unitstarts: List[int]
+    unitends: List[int]
+    unitstops: List[int]
+
+    def render(self, canvas: FrameCanvas, line: "MultisymbolScrollline", texty: int, offset: int) -> None:
+        left = 0
+        if offset >= 0:
+            # linkes Element: Symbol bleibt an lx stehen, Text läuft zeichenweise darunter weg
+            k = bisect_right(self.elemstarts, offset) - 1
+            symbol = self.symbols[k]
+            symbolwidth = 0
+            if symbol is not None:
+                symbolwidth = symbol.size[0]
+                if line.lx + symbolwidth - 1 > line.rx:
+                    return
+                drawppm_bottomleft(canvas, symbol, line.lx, texty+line.symoffset, transp=True)
+            charstarts = self.charstarts[k]
+            _ci = bisect_left(charstarts, offset + symbolwidth)
+            # nach dem letzten Zeichen beginnt das nächste Element, ggf. schon in dessen Abstandsspalte
+            left = charstarts[_ci] if _ci < len(charstarts) else max(self.elemstarts[k+1], self.textstops[k])
+            posttext = self.elemstarts[k+1] - offset - symbolwidth
+            if symbol is not None and posttext < 0:
+                _thissize = symbol.size[0]
+                for _y in range(texty+line.symoffset-symbol.size[1], texty+line.symoffset+1):
+                    graphics.DrawLine(canvas, line.lx+_thissize+posttext, _y, line.lx+_thissize-1, _y, line.bgcolor)
+        _ui = bisect_right(self.unitends, line.rx - line.lx + offset)
+        right = self.unitstarts[_ui] if _ui < len(self.unitstarts) else self.image.size[0]
+        if _ui > 0:
+            # das letzte gezeichnete Zeichen kann in den Beginn des nächsten Elements reichen
+            right = max(right, self.unitstops[_ui-1])
+        if right > left:
+            canvas.SetImage(self.image.crop((left, 0, right, self.image.size[1])), line.lx + left - offset, texty + self.top, True, True)
+
+
+def _symbolmask(symbol: Image.Image) -> Image.Image:
+    # wie SetImage mit transp: nur nicht-schwarze Pixel
+    return symbol.convert("RGB").point(lambda v: 255 if v else 0).convert("L").point(lambda v: 255 if v else 0)
 
 
 class MultisymbolScrollline:
@@ -37,7 +95,7 @@ class MultisymbolScrollline:
             self.letters_passed = 0
             self.curr_textxoffset = 0
 
-    def __init__(self, lx, rx, symoffset, font, defaulttextcolor, symdict, bgcolor_t=None, initial_pretext=2, initial_posttext=5, pretext_zero_if_no_symbol=True, add_end_spacer=True, last_char_separated=False, fixedy: Optional[int] = None):
+    def __init__(self, lx, rx, symoffset, font, defaulttextcolor, symdict, bgcolor_t=None, initial_pretext=2, initial_posttext=5, pretext_zero_if_no_symbol=True, add_end_spacer=True, last_char_separated=False, fixedy: Optional[int] = None, strip: bool = False):
         # attributes
         self.lx = lx
         self.rx = rx
@@ -52,6 +110,7 @@ class MultisymbolScrollline:
         self.add_end_spacer = add_end_spacer
         self.last_char_separated = last_char_separated
         self.fixedy = fixedy
+        self.strip = strip
         # self.staticleftsymtextspacing = staticleftsymtextspacing
         # self.forcescroll = forcescroll
         # self.noscroll = noscroll
@@ -63,68 +122,262 @@ class MultisymbolScrollline:
         self.currlastelemi = None
         self.shownelems = 0
         self.startpos = rx
+        self.groups: List[Tuple[Tuple[str, str, Optional[str]], List[MultisymbolScrollline.__Element]]] = []
+        self.spacer: Optional[MultisymbolScrollline.__Element] = None
+        self._strip: Optional[_ScrollStrip] = None
+        self.offset = 0
+
+    def _makeelements(self, meldung: Meldung) -> List["MultisymbolScrollline.__Element"]:
+        _symbol = self.symdict and self.symdict.get(meldung.symbol) or None
+        _text = ''.join(_char for _char in meldung.text if characterwidth(self.font, ord(_char)))
+        _elem = self.__class__.__Element(
+            text=_text,
+            symbol=_symbol,
+            textcolor=graphics.Color(*(int(meldung.color.lstrip("#")[i:i+2], 16) for i in (0, 2, 4))) if meldung.color else self.defaulttextcolor,
+            initial_pretext=self.initial_pretext if _text and (_symbol is not None or not self.pretext_zero_if_no_symbol) else 0,
+            initial_posttext=self.initial_posttext
+        )
+        if self.last_char_separated and _text:
+            # experimentell
+            _last = self.__class__.__Element(text=_text[-1], symbol=None, textcolor=_elem.textcolor, initial_pretext=0, initial_posttext=self.initial_posttext)
+            _elem.text = _text[:-1]
+            return [_elem, _last]
+        return [_elem]
+
+    def _current(self) -> Optional["MultisymbolScrollline.__Element"]:
+        # Element, das gerade links steht (None solange das erste noch von rechts hereinläuft)
+        if self._strip is not None:
+            if self.offset < 0:
+                return None
+            return self.elements[bisect_right(self._strip.elemstarts, self.offset) - 1]
+        if self.currfirstelemi is None or self.startpos > self.lx:
+            return None
+        return self.elements[self.currfirstelemi]
+
+    def _setposttext(self, elem: "MultisymbolScrollline.__Element", posttext: int, current: bool) -> None:
+        diff = posttext - elem.initial_posttext
+        if not diff:
+            return
+        started = elem.posttext < elem.initial_posttext
+        elem.initial_posttext = posttext
+        elem.posttext += diff
+        if current and started:
+            # nicht über das Ende hinaus, das nächste Element soll nicht springen
+            elem.posttext = max(elem.posttext, 1 - elem.symbol.size[0] if elem.symbol is not None else 0)
 
     def update(self, meldungs: List[Meldung]) -> None:
         if meldungs == self.meldungs:
             return
-        ...  # todo: schlaue anpassung je nach davor angezeigter meldung; dabei alle anderen zeilen hier anpassen
+        # Elemente bereits angezeigter Meldungen werden übernommen, das gerade links stehende behält
+        # seine Position; nur wenn keine der bisherigen Meldungen mehr dabei ist, beginnt alles von vorne
         self.meldungs = meldungs
-        self.elements = []
-        self.currfirstelemi = None
+        if self._strip is None and self.currfirstelemi is not None and self.startpos == self.lx:
+            _e = self.elements[self.currfirstelemi]
+            if _e.symbol is None and _e.posttext <= 0 and _e.letters_passed == len(_e.text) and not _e.curr_textxoffset and not _e.pretext:
+                # ist durchgelaufen, im nächsten Bild steht schon das folgende Element links
+                _e.reset()
+                self.currfirstelemi = (self.currfirstelemi + 1) % len(self.elements)
+        current = self._current()
+        stripdelta = self.offset - self._strip.elemstarts[bisect_right(self._strip.elemstarts, self.offset) - 1] if current is not None and self._strip is not None else 0
+
+        reusable: Dict[Tuple[str, str, Optional[str]], List[List[MultisymbolScrollline.__Element]]] = {}
+        for _key, _elems in self.groups:
+            reusable.setdefault(_key, []).append(_elems)
+        oldgroups = self.groups
+        self.groups = []
+        for meldung in meldungs:
+            _key = (meldung.symbol, meldung.text, meldung.color)
+            _old = reusable.get(_key)
+            self.groups.append((_key, _old.pop(0) if _old else self._makeelements(meldung)))
+        kept = {id(_elems) for _key, _elems in self.groups}
+        restart = not any(id(_elems) in kept for _key, _elems in oldgroups)
+
+        self.elements = [_e for _key, _elems in self.groups for _e in _elems]
         self.currlastelemi = None
         self.shownelems = 0
-        self.startpos = self.rx
-        for meldung in meldungs:
-            _symbol = self.symdict and self.symdict.get(meldung.symbol) or None
-            _text = ''.join(_char for _char in meldung.text if characterwidth(self.font, ord(_char)))
-            self.elements.append(
-                self.__class__.__Element(
-                    text=_text,
-                    symbol=_symbol,
-                    textcolor=graphics.Color(*(int(meldung.color.lstrip("#")[i:i+2], 16) for i in (0, 2, 4))) if meldung.color else self.defaulttextcolor,
-                    initial_pretext=self.initial_pretext if _text and (_symbol is not None or not self.pretext_zero_if_no_symbol) else 0,
-                    initial_posttext=self.initial_posttext
-                )
-            )
-        if self.elements:
-            if self.elements[0].symbol is not None:
-                self.startpos -= (self.elements[0].symbol.size[0] - 1)
-            if self.add_end_spacer:
-                self.elements[-1].initial_posttext = 0
-                self.elements[-1].posttext = 0
-                self.elements.append(self.__class__.__Element(text='', symbol=None, textcolor=self.defaulttextcolor, initial_pretext=0, initial_posttext=self.startpos-self.lx))
-
-        if self.last_char_separated:
-            # experimentell
-            _i = 0
-            for _e in self.elements[:]:
-                if _e.text:
-                    _i += 1
-                    self.elements.insert(_i, self.__class__.__Element(text=_e.text[-1], symbol=None, textcolor=_e.textcolor, initial_pretext=0, initial_posttext=_e.initial_posttext))
-                    _e.text = _e.text[:-1]
-                    _e.initial_posttext = 1
-                    _e.posttext = 1
-                _i += 1
-
-    def render(self, canvas: FrameCanvas, texty: int) -> None:
+        if not self.elements:
+            self.currfirstelemi = None
+            self.startpos = self.rx
+            self._strip = None
+            return
+        startpos = self.rx
+        if self.elements[0].symbol is not None:
+            startpos -= (self.elements[0].symbol.size[0] - 1)
+        if self.add_end_spacer:
+            if restart or self.spacer is None:
+                self.spacer = self.__class__.__Element(text='', symbol=None, textcolor=self.defaulttextcolor, initial_pretext=0, initial_posttext=startpos-self.lx)
+            self.elements.append(self.spacer)
+            self._setposttext(self.spacer, startpos-self.lx, self.spacer is current)
+        for _gi, (_key, _elems) in enumerate(self.groups):
+            for _ei, _e in enumerate(_elems):
+                if self.add_end_spacer and _gi == len(self.groups) - 1 and _ei == len(_elems) - 1:
+                    _posttext = 0
+                else:
+                    _posttext = 1 if _ei < len(_elems) - 1 else self.initial_posttext
+                self._setposttext(_e, _posttext, _e is current)
+
+        if restart:
+            self.currfirstelemi = None
+            self.startpos = startpos
+            for _e in self.elements:
+                _e.reset()
+        elif current is None:
+            # erstes Element läuft noch herein: Position bleibt, ggf. mit anderem ersten Element
+            self.currfirstelemi = None
+        else:
+            self.startpos = self.lx
+            _ci = next((_i for _i, _e in enumerate(self.elements) if _e is current), None)
+            if _ci is None:
+                # Meldung des linken Elements ist weggefallen: weiter mit der nächsten noch vorhandenen
+                _gi = next(_i for _i, (_key, _elems) in enumerate(oldgroups) if any(_e is current for _e in _elems))
+                _next = next(_elems for _key, _elems in oldgroups[_gi+1:] + oldgroups[:_gi] if id(_elems) in kept)
+                _ci = next(_i for _i, _e in enumerate(self.elements) if _e is _next[0])
+                stripdelta = 0
+                for _e in _next:
+                    _e.reset()
+            self.currfirstelemi = _ci
+
+        if self.strip:
+            self._strip = self._makestrip()
+            if self._strip is not None:
+                if restart:
+                    self.offset = self.lx - self.startpos
+                elif self.currfirstelemi is not None:
+                    # wie bei _setposttext höchstens bis zum Ende des Elements
+                    _starts = self._strip.elemstarts
+                    _length = _starts[self.currfirstelemi+1] - _starts[self.currfirstelemi]
+                    self.offset = _starts[self.currfirstelemi] + min(stripdelta, max(0, _length - (self.elements[self.currfirstelemi].symbol is not None)))
+                    if self.offset >= self._strip.period:
+                        self.offset -= self._strip.period
+
+    def _makestrip(self) -> Optional[_ScrollStrip]:
+        data = bdf.fontdata(self.font)
+        # schwarzer Text wäre beim Zeichnen mit transp unsichtbar
+        if data is None or any(not (_e.textcolor.red or _e.textcolor.green or _e.textcolor.blue) for _e in self.elements):
+            return None
+        n = len(self.elements)
+        # ohne Abstand vor einem Symbol weicht render() um eine Spalte von der Anordnung hier ab: dann wie bisher zeichnen
+        if any(_e.initial_posttext <= 0 and self.elements[(_i + 1) % n].symbol is not None for _i, _e in enumerate(self.elements)):
+            return None
+        window = self.rx - self.lx + 1
+        elemstarts: List[int] = []
+        charstarts: List[List[int]] = []
+        textstops: List[int] = []
+        unitstarts: List[int] = []
+        unitends: List[int] = []
+        unitstops: List[int] = []
+        placed: List[Tuple[MultisymbolScrollline.__Element, int, int]] = []
+        period = 0
+        pos = 0
+        _i = 0
+        # Positionen wie beim Zeichnen der nicht-linken Elemente in render()
+        while True:
+            if _i == n:
+                period = pos
+                if period <= 0:
+                    return None
+            if _i >= n and pos >= period + window:
+                break
+            elem = self.elements[_i % n]
+            _cs: List[int] = []
+            symbolwidth = elem.symbol.size[0] if elem.symbol is not None else 0
+            unitstarts.append(pos)
+            unitends.append(pos + max(0, symbolwidth - 1))
+            unitstops.append(pos + symbolwidth)
+            textpos = pos + symbolwidth + elem.initial_pretext
+            placed.append((elem, pos, textpos))
+            if _i < n:
+                elemstarts.append(pos)
+            pos = textpos
+            if _i < n:
+                textstops.append(textpos + textpx(self.font, elem.text) + 1 if elem.text else textpos)
+            if elem.text:
+                _prefix = prefixwidths(self.font, elem.text)
+                for _c in range(len(elem.text)):
+                    _cs.append(textpos + _prefix[_c])
+                    unitstarts.append(textpos + _prefix[_c])
+                    unitends.append(textpos + _prefix[_c+1] - 2)
+                    unitstops.append(textpos + _prefix[_c+1])
+                pos += _prefix[-1] - 1
+            pos += elem.initial_posttext
+            if _i < n:
+                charstarts.append(_cs)
+            _i += 1
+        elemstarts.append(period)
+        unitends = list(accumulate(unitends, max))
+        unitstops = list(accumulate(unitstops, max))
+
+        ys = [dy for _c in set(''.join(_e.text for _e in self.elements)) if (_g := data.glyph(ord(_c))) is not None for dx, dy in _g.pixels]
+        symbolheights = [_e.symbol.size[1] for _e in self.elements if _e.symbol is not None]
+        top = min(ys + [self.symoffset - _h for _h in symbolheights] or [0])
+        bottom = max(ys + [self.symoffset - 1 for _h in symbolheights] or [0])
+        width = max(_textpos + textpx(self.font, _e.text) + 1 if _e.text else _pos + (_e.symbol.size[0] if _e.symbol is not None else 0)
+                    for _e, _pos, _textpos in placed)
+        size = (max(1, width), bottom - top + 1)
+        image = Image.new("RGB", size)
+        pixels = image.load()
+        masks: Dict[int, Image.Image] = {}
+        for elem, _pos, _textpos in placed:
+            if elem.symbol is not None:
+                _mask = masks.get(id(elem.symbol))
+                if _mask is None:
+                    _mask = masks[id(elem.symbol)] = _symbolmask(elem.symbol)
+                image.paste(elem.symbol.convert("RGB"), (_pos, self.symoffset - elem.symbol.size[1] - top), _mask)
+            if elem.text:
+                bdf.draw_text(pixels, size, data, _textpos, -top, (elem.textcolor.red, elem.textcolor.green, elem.textcolor.blue), elem.text)
+        return _ScrollStrip(image=image, top=top, period=period, elemstarts=elemstarts,
+                            symbols=[_e.symbol for _e in self.elements], charstarts=charstarts, textstops=textstops,
+                            unitstarts=unitstarts, unitends=unitends, unitstops=unitstops)
+
+    def render(self, canvas: FrameCanvas, texty: int, steps: int = 1) -> None:
+        # steps: Pixel, um die seit dem vorigen Bild weitergescrollt wird (siehe timing.FrameClock)
         if not self.elements:
             return
         texty = self.fixedy if self.fixedy is not None else texty
+        # wie bisher wird gezeichnet und danach um einen Schritt weitergescrollt, zusätzliche Schritte davor;
+        # bei steps 0 (Bilder schneller als Scrollschritte) wird nur gezeichnet
+        if self._strip is not None:
+            if steps > 0:
+                self._advancestrip(steps - 1)
+            self._strip.render(canvas, self, texty, self.offset)
+            if steps > 0:
+                self._advancestrip(1)
+            return
+        for _ in range(steps - 1):
+            self._frame(None, texty)
+        self._frame(canvas, texty, steps > 0)
+
+    def _advancestrip(self, steps: int) -> None:
+        self.offset += steps
+        if self.offset >= self._strip.period:
+            # negativ solange das erste Element noch hereinläuft
+            self.offset %= self._strip.period
+
+    def _frame(self, canvas: Optional[FrameCanvas], texty: int, advance: bool = True) -> None:
+        # zeichnen und um einen Schritt weiterscrollen, ohne canvas nur weiterscrollen, mit advance=False nur zeichnen
         currx = self.startpos
         if self.currfirstelemi is None:
             self.currfirstelemi = 0
         elemi = self.currfirstelemi
         self.shownelems = 0
+        # ohne Weiterscrollen ändert sich nichts an den Elementen: kommt der Durchlauf ohne Fortschritt
+        # wieder beim selben Element an (z. B. nur Elemente ohne Breite), würde er endlos weiterlaufen
+        _visited = set()
         while currx <= self.rx:
+            if not advance:
+                if (elemi, currx) in _visited:
+                    break
+                _visited.add((elemi, currx))
             elem = self.elements[elemi]
             isleftelem = currx == self.lx
             if currx + (elem.symbol is not None and (elem.symbol.size[0] - 1)) <= self.rx:
                 self.shownelems += 1
                 self.currlastelemi = elemi
-                if elem.symbol is not None: currx = drawppm_bottomleft(canvas, elem.symbol, currx, texty+self.symoffset, transp=True)
+                if elem.symbol is not None:
+                    currx = drawppm_bottomleft(canvas, elem.symbol, currx, texty+self.symoffset, transp=True) if canvas is not None else currx + elem.symbol.size[0]
                 if isleftelem:
                     currx += elem.pretext
-                    text_max = propscroll(self.font, elem.text[elem.letters_passed:], currx+elem.curr_textxoffset, self.rx)
+                    text_max = propscroll(self.font, elem.text, currx+elem.curr_textxoffset, self.rx, elem.letters_passed)
                 else:
                     currx += elem.initial_pretext
                     text_max = propscroll(self.font, elem.text, currx, self.rx)
@@ -134,32 +387,36 @@ class MultisymbolScrollline:
                     # _total_text wird unten verwendet, Wert wird hier gespeichert, damit er bis dahin unverändert bleibt
                     _total_text = (isleftelem and elem.letters_passed) + text_max
                     if text_max:
-                        if isleftelem:
-                            currx += graphics.DrawText(canvas, self.font, currx, texty, elem.textcolor, elem.text[elem.letters_passed:elem.letters_passed+text_max]) - 1
+                        _first = isleftelem and elem.letters_passed
+                        if canvas is not None:
+                            currx += graphics.DrawText(canvas, self.font, currx, texty, elem.textcolor, elem.text[_first:_first+text_max]) - 1
+                        else:
+                            _prefix = prefixwidths(self.font, elem.text)
+                            currx += _prefix[_first+text_max] - _prefix[_first] - 1
+                        if isleftelem and advance:
                             if not elem.pretext:
                                 elem.curr_textxoffset -= 1
                             if elem.curr_textxoffset < 0:
                                 elem.curr_textxoffset = characterwidth(self.font, ord(elem.text[elem.letters_passed])) - 1
                                 elem.letters_passed += 1
-                        else:
-                            currx += graphics.DrawText(canvas, self.font, currx, texty, elem.textcolor, elem.text[:text_max]) - 1
                     else:  # if ((not elem.text) or (isleftelem and elem.letters_passed = len(elem.text))):
-                        if isleftelem and elem.posttext < 0 and elem.symbol is not None:
+                        if canvas is not None and isleftelem and elem.posttext < 0 and elem.symbol is not None:
                             _thissize = elem.symbol.size[0]
                             for _y in range(texty+self.symoffset-elem.symbol.size[1], texty+self.symoffset+1):
                                 graphics.DrawLine(canvas, self.lx+_thissize+elem.posttext, _y, self.lx+_thissize-1, _y, self.bgcolor)
                     if isleftelem:
                         currx += elem.posttext
-                        if elem.letters_passed == len(elem.text):
-                            if elem.curr_textxoffset:
-                                elem.curr_textxoffset -= 1
-                            elif not elem.pretext:
-                                elem.posttext -= 1
-                        if elem.pretext: elem.pretext -= 1
-                        if elem.posttext <= ((elem.symbol is not None and -elem.symbol.size[0]) or -1):
-                            elem.reset()
-                            self.currfirstelemi = (self.currfirstelemi + 1) % len(self.elements)
-                            self.shownelems -= 1
+                        if advance:
+                            if elem.letters_passed == len(elem.text):
+                                if elem.curr_textxoffset:
+                                    elem.curr_textxoffset -= 1
+                                elif not elem.pretext:
+                                    elem.posttext -= 1
+                            if elem.pretext: elem.pretext -= 1
+                            if elem.posttext <= ((elem.symbol is not None and -elem.symbol.size[0]) or -1):
+                                elem.reset()
+                                self.currfirstelemi = (self.currfirstelemi + 1) % len(self.elements)
+                                self.shownelems -= 1
                     else:
                         currx += elem.initial_posttext
                     if _total_text < len(elem.text):
@@ -167,7 +424,7 @@ class MultisymbolScrollline:
                     elemi = (elemi + 1) % len(self.elements)
                 else: break
             else: break
-        if self.startpos > self.lx: self.startpos -= 1
+        if advance and self.startpos > self.lx: self.startpos -= 1
 
 
 class SimpleScrollline:
@@ -203,25 +460,43 @@ class SimpleScrollline:
         self.text_max_theoretical = propscroll(self.font, self.text, self.base_start_static, self.rx)
         self.willscroll = (not self.noscroll) and (self.forcescroll or self.textlen > self.text_max_theoretical)
 
-    def render(self, canvas: FrameCanvas, texty: int) -> None:
+    def render(self, canvas: FrameCanvas, texty: int, steps: int = 1) -> None:
+        # steps: Pixel, um die seit dem vorigen Bild weitergescrollt wird (siehe timing.FrameClock)
         texty = self.fixedy if self.fixedy is not None else texty
         if self.symbol: drawppm_bottomleft(canvas, self.symbol, self.lx, texty+self.symoffset, transp=True)
         if not self.text: return
         if self.willscroll:
+            for _ in range(steps):
+                if self.letters_passed >= self.textlen:
+                    self.letters_passed = 0
+                    self.currx = self.rx
+                self.currx -= 1
+                if self.currx < self.base_start:
+                    self.currx = self.base_start + characterwidth(self.font, ord(self.text[self.letters_passed])) - 1
+                    self.letters_passed += 1
             if self.letters_passed >= self.textlen:
                 self.letters_passed = 0
                 self.currx = self.rx
-            text_max = propscroll(self.font, self.text[self.letters_passed:], self.currx, self.rx)
-            scrolllen = graphics.DrawText(canvas, self.font, self.currx, texty, self.textcolor, self.text[self.letters_passed:self.letters_passed+text_max])
-            self.currx -= 1
-            if self.currx < self.base_start:
-                self.currx = self.base_start + characterwidth(self.font, ord(self.text[self.letters_passed])) - 1
-                self.letters_passed += 1
-        else: graphics.DrawText(canvas, self.font, self.base_start_static, texty, self.textcolor, self.text[:self.text_max_theoretical])
+            text_max = propscroll(self.font, self.text, self.currx, self.rx, self.letters_passed)
+            sprites.draw(canvas, self.font, self.currx, texty, self.textcolor, self.text, self.letters_passed, self.letters_passed+text_max)
+        else: sprites.draw(canvas, self.font, self.base_start_static, texty, self.textcolor, self.text, 0, self.text_max_theoretical)
 
 
 _retexttype = Callable[[Match], str]
 
+
+# Kürzungen für fittext (Liniennummer zu depdata.linenumpattern), als benannte Funktionen
+# statt Lambdas, damit sie als Schlüssel im fittext-Cache stabil sind
+def retext_letters_number(_s: Match) -> str:
+    # "SB 71" -> "SB71"
+    return _s.group(1) + _s.group(2)
+
+
+def retext_letters(_s: Match) -> str:
+    # "SB 71" -> "SB"
+    return _s.group(1)
+
+
 @dataclass
 class LinenumOptions:
     width: int
@@ -252,10 +527,9 @@ class RealtimeColors:
 class CountdownOptions:
     font: graphics.Font
     realtime_colors: RealtimeColors
+    # weiß, werden beim Zeichnen in der jeweiligen Echtzeitfarbe eingefärbt (drawstuff.tinted)
     mot_symbols: Dict[MOT, Image.Image]
-    mot_coloured_symbols: Dict[graphics.Color, Dict[MOT, Image.Image]]
     min_symbol: Image.Image
-    min_coloured_symbols: Dict[graphics.Color, Image.Image]
     mindelay: int
     minslightdelay: int
     minnegativedelay: int
@@ -280,6 +554,35 @@ class PlatformOptions:
     normalsmalloffset: int
 
 
+@dataclass
+class _DepartureLayout:
+    # alles an einer Abfahrtszeile, was nur von der Abfahrt und der Position abhängt;
+    # y-Werte relativ zur Grundlinie der Zeile
+    linenum_font: graphics.Font
+    linenum_str: str
+    linenum_x: int
+    linenum_yoffset: int
+    linenum_color: graphics.Color
+    linenum_bgcolor: graphics.Color
+    # Font, Text, x, y-Versatz, Farbe
+    platform: Optional[Tuple[graphics.Font, str, int, int, graphics.Color]]
+    dirtextcolor: graphics.Color
+    # Zeichen des Zieltexts (bzw. des Ausfalltexts), die neben eine Abfahrtszeit
+    # mit der jeweiligen Breite passen: (Breite, Ausfalltext) -> Anzahl
+    directionlimits: Dict[Tuple[int, bool], int] = field(default_factory=dict)
+
+
+@dataclass
+class _CountdownVariant:
+    # Abfahrtszeit einer Zeile für einen Minutenwert: Text (rechtsbündig vor dem Symbol)
+    # und/oder Symbol (rechtsbündig), belegte Breite, ob nur in der Blinkphase gezeichnet
+    text: Optional[str]
+    textx: int
+    symbol: Optional[Image.Image]
+    width: int
+    blinks: bool
+
+
 class StandardDepartureLine:
     def __init__(
             self,
@@ -295,7 +598,8 @@ class StandardDepartureLine:
             countdownopt: CountdownOptions,
             platformopt: Optional[PlatformOptions],
             fixedy: Optional[int] = None,
-            cancelled_blink_text: Optional[str] = "entfällt"):
+            cancelled_blink_text: Optional[str] = "entfällt",
+            static_layers: bool = True):
         self.lx = lx
         self.rx = rx
         self.font = font
@@ -309,11 +613,20 @@ class StandardDepartureLine:
         self.platformopt = platformopt
         self.fixedy = fixedy
         self.cancelled_blink_text = cancelled_blink_text
+        # Liniennummer, Steig und Zieltext werden pro Abfahrt einmal in ein Bild gezeichnet,
+        # das geht nur mit Schriften, deren BDF-Daten bekannt sind (drawstuff.loadfont)
+        _fonts = [self.font, self.linenumopt.normalFont, self.linenumopt.smallFont]
+        if self.platformopt is not None:
+            _fonts.extend((self.platformopt.normalFont, self.platformopt.smallFont))
+        self.static_layers = static_layers and all(bdf.fontdata(_f) is not None for _f in _fonts)
+        self._layers: Dict[Tuple[int, int], Optional[Tuple[Image.Image, int, int]]] = {}
 
         self.dep: Optional[Departure] = None
-        self.dep_tz: Optional[timezone] = None
+        self.deptimestamp = 0.0
+        self.countdown: Optional[int] = None
+        self.countdownvariant: Optional[_CountdownVariant] = None
         self.rtcolor: graphics.Color = self.countdownopt.realtime_colors.no_realtime
-        self.dirtextcolor: graphics.Color = self.textColor
+        self.layout: Optional[_DepartureLayout] = None
 
         self.linenum_min: int
         self.linenum_max: int
@@ -324,6 +637,7 @@ class StandardDepartureLine:
         self.setminmax()
 
     def setminmax(self) -> None:
+        self._layers.clear()
         self.linenum_min = self.lx
         self.linenum_max = self.linenum_min + self.linenumopt.width - 1
 
@@ -335,15 +649,21 @@ class StandardDepartureLine:
             self.platform_min = self.deptime_x_max + self.space_countdown_platform + 1
             self.platform_max = self.platform_min + self.platformopt.width - 1
 
+        self.layout = self._makelayout() if self.dep is not None else None
+        self.countdownvariant = None
+
     def update(self, dep: Departure) -> None:
         if dep == self.dep:
             return
 
         self.dep = dep
+        self._layers.clear()
+        self.countdownvariant = None
         if self.dep is None:
+            self.layout = None
             return
 
-        self.dep_tz = self.dep.deptime.tzinfo
+        self.deptimestamp = self.dep.deptime.timestamp()
 
         rtc = self.countdownopt.realtime_colors
         if self.dep.realtime:
@@ -360,12 +680,9 @@ class StandardDepartureLine:
         else:
             self.rtcolor = rtc.no_realtime
 
-    def render(self, canvas: FrameCanvas, texty: int, blinkon: bool) -> None:
-        if self.dep is None:
-            return
-
-        texty = self.fixedy if self.fixedy is not None else texty
+        self.layout = self._makelayout()
 
+    def _makelayout(self) -> _DepartureLayout:
         if self.dep.color:
             linenum_color = graphics.Color(*hex_to_rgb(self.dep.color))
             linenum_bgColor = graphics.Color()
@@ -373,10 +690,6 @@ class StandardDepartureLine:
             linenum_color = self.linenumopt.fgColor
             linenum_bgColor = self.linenumopt.bgColor
 
-        if self.linenumopt.drawbg:
-            for y in range(texty-self.linenumopt.height, texty):
-                graphics.DrawLine(canvas, self.linenum_min, y, self.linenum_max, y, linenum_bgColor)
-
         linenum_font, linenum_str, linenum_px, linenum_verticaloffset = fittext(
             self.dep.disp_linenum,
             self.linenumopt.width,
@@ -390,46 +703,7 @@ class StandardDepartureLine:
             alt_retext_2=self.linenumopt.retext_2)
         linenum_xpos = self.linenum_min if self.linenumopt.align_left else (self.linenum_max - linenum_px + (linenum_px == self.linenumopt.width))
 
-        graphics.DrawText(canvas, linenum_font, linenum_xpos, texty-linenum_verticaloffset, linenum_color, linenum_str)
-
-        directionpixel = self.deptime_x_max - self.direction_xpos
-        timeoffset = 0
-
-        dep_countdown: int
-        if self.countdownopt.use_disp_countdown:
-            dep_countdown = self.dep.disp_countdown
-        else:
-            dep_countdown_secs: int = (self.dep.deptime - datetime.now(self.dep_tz)).total_seconds()
-            dep_countdown = 0 if (-75 < dep_countdown_secs < 30) else int((dep_countdown_secs + 60) // 60)
-
-        if self.dep.cancelled and self.countdownopt.cancelled_symbol is not None:
-            drawppm_bottomright(canvas, self.countdownopt.cancelled_symbol, self.deptime_x_max, texty, transp=True)
-            timeoffset += self.countdownopt.cancelled_symbol.size[0]
-        elif dep_countdown > self.countdownopt.maxmin or self.dep.cancelled:
-            timestr = clockstr_tt(self.dep.deptime.timetuple())
-            timestrpx = textpx(self.countdownopt.font, timestr)
-            graphics.DrawText(canvas, self.countdownopt.font, self.deptime_x_max - timestrpx + 1, texty, self.rtcolor, timestr)
-            timeoffset += timestrpx
-        elif not dep_countdown and (self.countdownopt.zerobus or self.countdownopt.zerosofort):
-            if blinkon or not self.countdownopt.blink:
-                if self.countdownopt.zerobus:
-                    drawppm_bottomright(canvas, self.countdownopt.mot_coloured_symbols[self.dep.mot][self.rtcolor], self.deptime_x_max, texty, transp=True)
-                    timeoffset += self.countdownopt.mot_symbols[self.dep.mot].size[0]
-                elif self.countdownopt.zerosofort:
-                    timestr = " sofort"
-                    timestrpx = textpx(self.countdownopt.font, timestr)
-                    graphics.DrawText(canvas, self.countdownopt.font, self.deptime_x_max - timestrpx + 1, texty, self.rtcolor, timestr)
-                    timeoffset += timestrpx
-        elif dep_countdown or blinkon or not self.countdownopt.blink:  # mehr als 0, oder es ist 0 und kein zerobus/zerosofort
-            min_text = self.countdownopt.min_text and not self.countdownopt.in_min_text
-            timestr = (f" in {dep_countdown} min" if dep_countdown >= 0 else f" vor {abs(dep_countdown)} min") if self.countdownopt.in_min_text else str(dep_countdown)
-            timestrpx = textpx(self.countdownopt.font, timestr)
-            graphics.DrawText(canvas, self.countdownopt.font, self.deptime_x_max - timestrpx - ((self.countdownopt.min_symbol.size[0]-1+self.countdownopt.min_text_offset) if min_text else -1), texty, self.rtcolor, timestr)
-            timeoffset += timestrpx
-            if min_text:
-                drawppm_bottomright(canvas, self.countdownopt.min_coloured_symbols[self.rtcolor], self.deptime_x_max, texty, transp=True)
-                timeoffset += self.countdownopt.min_symbol.size[0] + self.countdownopt.min_text_offset
-
+        platform = None
         if self.platformopt is not None and self.platformopt.width > 0 and self.dep.platformno:
             platprefix = self.dep.platformtype or ("Gl." if self.dep.mot in trainMOT else "Bstg.")
             full_str = platprefix + str(self.dep.platformno)
@@ -449,46 +723,220 @@ class StandardDepartureLine:
             platformchanged = self.dep.platformno_planned and (self.dep.platformno_planned != self.dep.platformno)
             platform_color = self.platformopt.texthighlightColor if platformchanged else self.platformopt.textColor
             platform_xpos = self.platform_max - platpx + 1
-            graphics.DrawText(canvas, platform_font, platform_xpos, texty-platform_verticaloffset, platform_color, platform_str)
+            platform = (platform_font, platform_str, platform_xpos, platform_verticaloffset, platform_color)
+
+        return _DepartureLayout(
+            linenum_font=linenum_font,
+            linenum_str=linenum_str,
+            linenum_x=linenum_xpos,
+            linenum_yoffset=linenum_verticaloffset,
+            linenum_color=linenum_color,
+            linenum_bgcolor=linenum_bgColor,
+            platform=platform,
+            dirtextcolor=self.texthighlightColor if self.dep.earlytermination else self.textColor)
+
+    def _directionlimit(self, timeoffset: int, cancelled_blink: bool) -> int:
+        _key = (timeoffset, cancelled_blink)
+        limit = self.layout.directionlimits.get(_key)
+        if limit is None:
+            directionpixel = self.deptime_x_max - self.direction_xpos - (timeoffset + self.space_direction_countdown*bool(timeoffset))
+            dirtext = self.cancelled_blink_text if cancelled_blink else self.dep.disp_direction
+            limit = self.layout.directionlimits[_key] = propscroll(self.font, dirtext, self.direction_xpos, self.direction_xpos+directionpixel)
+        return limit
+
+    def _drawstatic(self, texty: int, directionlimit: int,
+                    drawtext: Callable[[graphics.Font, int, int, graphics.Color, str], int],
+                    fillrect: Callable[[int, int, int, int, graphics.Color], None]) -> None:
+        # alles was sich nur mit der Abfahrt ändert; Zieltext bis directionlimit
+        layout = self.layout
+        if self.linenumopt.drawbg:
+            fillrect(self.linenum_min, texty-self.linenumopt.height, self.linenum_max, texty-1, layout.linenum_bgcolor)
+
+        drawtext(layout.linenum_font, layout.linenum_x, texty-layout.linenum_yoffset, layout.linenum_color, layout.linenum_str)
+
+        if layout.platform is not None:
+            platform_font, platform_str, platform_xpos, platform_verticaloffset, platform_color = layout.platform
+            drawtext(platform_font, platform_xpos, texty-platform_verticaloffset, platform_color, platform_str)
+
+        if directionlimit:
+            drawtext(self.font, self.direction_xpos, texty, layout.dirtextcolor, self.dep.disp_direction[:directionlimit])
+
+    def _makelayer(self, texty: int, directionlimit: int) -> Optional[Tuple[Image.Image, int, int]]:
+        texts: List[Tuple[bdf.CompiledFont, int, int, Tuple[int, int, int], str]] = []
+        rects: List[Tuple[int, int, int, int, Tuple[int, int, int]]] = []
+
+        def _text(font, x, y, color, text):
+            texts.append((bdf.fontdata(font), x, y, (color.red, color.green, color.blue), text))
+            return 0
+
+        def _rect(x0, y0, x1, y1, color):
+            rects.append((x0, y0, x1, y1, (color.red, color.green, color.blue)))
+
+        self._drawstatic(texty, directionlimit, _text, _rect)
+        if not texts and not rects:
+            return None
+        top = min([y - _f.baseline for _f, x, y, c, t in texts] + [y0 for x0, y0, x1, y1, c in rects])
+        bottom = max([y + _f.height - _f.baseline for _f, x, y, c, t in texts] + [y1 + 1 for x0, y0, x1, y1, c in rects])
+        size = (self.rx - self.lx + 1, bottom - top)
+        layer = Image.new("RGB", size)
+        for x0, y0, x1, y1, color in rects:
+            layer.paste(color, (x0 - self.lx, y0 - top, x1 - self.lx + 1, y1 - top + 1))
+        pixels = layer.load()
+        for _f, x, y, color, text in texts:
+            bdf.draw_text(pixels, size, _f, x - self.lx, y - top, color, text)
+        return layer, self.lx, bottom
+
+    def _oncountdown(self, dep_countdown: int) -> None:
+        # nur wenn sich der angezeigte Minutenwert ändert (oder Abfahrt/Position neu sind)
+        self.countdown = dep_countdown
+        _font = self.countdownopt.font
+        if self.dep.cancelled and self.countdownopt.cancelled_symbol is not None:
+            self.countdownvariant = _CountdownVariant(None, 0, self.countdownopt.cancelled_symbol, self.countdownopt.cancelled_symbol.size[0], False)
+        elif dep_countdown > self.countdownopt.maxmin or self.dep.cancelled:
+            timestr = clockstr_tt(self.dep.deptime.timetuple())
+            timestrpx = textpx(_font, timestr)
+            self.countdownvariant = _CountdownVariant(timestr, self.deptime_x_max - timestrpx + 1, None, timestrpx, False)
+        elif not dep_countdown and (self.countdownopt.zerobus or self.countdownopt.zerosofort):
+            if self.countdownopt.zerobus:
+                self.countdownvariant = _CountdownVariant(None, 0, tinted(self.countdownopt.mot_symbols[self.dep.mot], self.rtcolor),
+                                                          self.countdownopt.mot_symbols[self.dep.mot].size[0], self.countdownopt.blink)
+            else:
+                timestr = " sofort"
+                timestrpx = textpx(_font, timestr)
+                self.countdownvariant = _CountdownVariant(timestr, self.deptime_x_max - timestrpx + 1, None, timestrpx, self.countdownopt.blink)
+        else:
+            # mehr als 0, oder es ist 0 und kein zerobus/zerosofort
+            min_text = self.countdownopt.min_text and not self.countdownopt.in_min_text
+            timestr = (f" in {dep_countdown} min" if dep_countdown >= 0 else f" vor {abs(dep_countdown)} min") if self.countdownopt.in_min_text else str(dep_countdown)
+            timestrpx = textpx(_font, timestr)
+            timestrx = self.deptime_x_max - timestrpx - ((self.countdownopt.min_symbol.size[0]-1+self.countdownopt.min_text_offset) if min_text else -1)
+            if min_text:
+                self.countdownvariant = _CountdownVariant(timestr, timestrx, tinted(self.countdownopt.min_symbol, self.rtcolor),
+                                                          timestrpx + self.countdownopt.min_symbol.size[0] + self.countdownopt.min_text_offset,
+                                                          not dep_countdown and self.countdownopt.blink)
+            else:
+                self.countdownvariant = _CountdownVariant(timestr, timestrx, None, timestrpx, not dep_countdown and self.countdownopt.blink)
 
-        directionpixel -= (timeoffset + self.space_direction_countdown*bool(timeoffset))
-        dirtext = self.cancelled_blink_text if (self.cancelled_blink_text and self.dep.cancelled and blinkon) else self.dep.disp_direction
-        directionlimit = propscroll(self.font, dirtext, self.direction_xpos, self.direction_xpos+directionpixel)
-        dirtextcolor = self.texthighlightColor if self.dep.earlytermination else self.textColor
-        graphics.DrawText(canvas, self.font, self.direction_xpos, texty, dirtextcolor, dirtext[:directionlimit])
+    def render(self, canvas: FrameCanvas, texty: int, clock: FrameClock) -> None:
+        if self.dep is None:
+            return
+
+        texty = self.fixedy if self.fixedy is not None else texty
+        blinkon = clock.blinkon()
+
+        dep_countdown: int
+        if self.countdownopt.use_disp_countdown:
+            dep_countdown = self.dep.disp_countdown
+        else:
+            dep_countdown_secs = self.deptimestamp - clock.time
+            dep_countdown = 0 if (-75 < dep_countdown_secs < 30) else int((dep_countdown_secs + 60) // 60)
+        if dep_countdown != self.countdown or self.countdownvariant is None:
+            self._oncountdown(dep_countdown)
+
+        timeoffset = 0
+        _variant = self.countdownvariant
+        if blinkon or not _variant.blinks:
+            if _variant.text is not None:
+                drawtext(canvas, self.countdownopt.font, _variant.textx, texty, self.rtcolor, _variant.text)
+            if _variant.symbol is not None:
+                drawppm_bottomright(canvas, _variant.symbol, self.deptime_x_max, texty, transp=True)
+            timeoffset = _variant.width
+
+        cancelled_blink = bool(self.cancelled_blink_text and self.dep.cancelled and blinkon)
+        directionlimit = self._directionlimit(timeoffset, cancelled_blink)
+        staticlimit = 0 if cancelled_blink else directionlimit
+
+        if self.static_layers:
+            _key = (texty, staticlimit)
+            try:
+                layer = self._layers[_key]
+            except KeyError:
+                layer = self._layers[_key] = self._makelayer(texty, staticlimit)
+            if layer is not None:
+                drawppm_bottomleft(canvas, *layer, transp=True)
+        else:
+            def _fillrect(x0, y0, x1, y1, color):
+                for y in range(y0, y1+1):
+                    graphics.DrawLine(canvas, x0, y, x1, y, color)
+            self._drawstatic(texty, staticlimit, lambda *_a: drawtext(canvas, *_a), _fillrect)
+
+        if cancelled_blink:
+            sprites.draw(canvas, self.font, self.direction_xpos, texty, self.layout.dirtextcolor, self.cancelled_blink_text, 0, directionlimit)
+
+
+class _FontWidths:
+    # Zeichenbreiten eines Fonts als Tabelle über die Basic Multilingual Plane, U+FFFD-Ersatz
+    # bzw. 0 für fehlende Zeichen schon eingetragen. Bei Fonts mit BDF-Daten (drawstuff.loadfont)
+    # sofort vollständig, sonst nach und nach über font.CharacterWidth.
+    __slots__ = ("font", "fallback", "table")
+    unknown = 0xFF
+
+    def __init__(self, font: graphics.Font):
+        self.font = font
+        self.fallback = max(0, font.CharacterWidth(0xFFFD))
+        data = bdf.fontdata(font)
+        if data is None:
+            self.table = bytearray([self.unknown]) * 0x10000
+        else:
+            self.table = bytearray([self.fallback]) * 0x10000
+            for cp, _cw in data.widths():
+                if cp < 0x10000:
+                    self.table[cp] = max(0, min(_cw, self.unknown - 1))
+
+    def width(self, cp: int) -> int:
+        if cp < 0x10000:
+            _cw = self.table[cp]
+            if _cw != self.unknown:
+                return _cw
+        _cw = self.font.CharacterWidth(cp)
+        if _cw == -1:
+            _cw = self.fallback
+        if cp < 0x10000:
+            self.table[cp] = _cw
+        return _cw
+
+
+_fontwidths: Dict[graphics.Font, _FontWidths] = {}
+
+
+def _widths(font: graphics.Font) -> _FontWidths:
+    _fw = _fontwidths.get(font)
+    if _fw is None:
+        _fw = _fontwidths[font] = _FontWidths(font)
+    return _fw
 
 
 # beides ohne extra_spacing
-@lru_cache(maxsize=4096)
-def propscroll(font: graphics.Font, text: str, start: int, end: int) -> int:
-    c = 0
-    cpx = 0
+@cached("prefixwidths", 256)
+def prefixwidths(font: graphics.Font, text: str) -> List[int]:
+    # prefixwidths(font, text)[i]: Breite von text[:i] inkl. Abstand nach dem letzten Zeichen
+    _width = _widths(font).width
+    return list(accumulate((_width(ord(c)) for c in text), initial=0))
+
+
+def propscroll(font: graphics.Font, text: str, start: int, end: int, offset: int = 0) -> int:
+    # Anzahl der Zeichen ab text[offset:], die zwischen start und end passen
     pixel = end - start + 1 + 1  # + 1 wegen space am ende jedes zeichens, was am ende egal ist
-    while c < len(text):
-        _cpx = cpx + characterwidth(font, ord(text[c]))
-        if _cpx > pixel:
-            break
-        c += 1
-        cpx = _cpx
-    return c
+    _prefix = prefixwidths(font, text)
+    return max(0, bisect_right(_prefix, _prefix[offset] + pixel, offset) - 1 - offset)
 
 
-@lru_cache(maxsize=64)
 def textpx(font: graphics.Font, text: str) -> int:
-    return sum(characterwidth(font, ord(c)) for c in text) - 1
+    return prefixwidths(font, text)[-1] - 1
 
 
-@lru_cache(maxsize=None)
 def characterwidth(font: graphics.Font, cp: int) -> int:
-    _cw = font.CharacterWidth(cp)
-    if _cw == -1:
-        _cw = font.CharacterWidth(65533)
-        if _cw == -1:
-            _cw = 0
-    return _cw
+    return _widths(font).width(cp)
+
+
+def _fittextkey(text: str, avail_width: int, start: int, end: int, normalfont: graphics.Font, smallfont: graphics.Font,
+                smallpxoffset: int = 0, alt_text: str = None, pattern: Optional[Pattern] = None,
+                alt_retext_1: Optional[_retexttype] = None, alt_retext_2: Optional[_retexttype] = None) -> tuple:
+    # von start und end zählt nur der Abstand, so teilen sich z. B. Spalten gleicher Breite die Einträge
+    return (text, avail_width, end - start, normalfont, smallfont, smallpxoffset, alt_text, pattern, alt_retext_1, alt_retext_2)
 
 
-@lru_cache(maxsize=64)
+@cached("fittext", 64, key=_fittextkey)
 def fittext(text: str,
             avail_width: int,
             start: int,
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Aufzeichnen und Wiedergeben der Antworten, die dm.depdata abruft (--record / --replay).
+# Jeder Prozess schreibt eine eigene Datei DIR/<Start>-<pid>.jsonl.gz, eine JSON-Zeile pro Abruf.
+# Bei der Wiedergabe läuft eine eigene Uhr ab dem Beginn der Aufzeichnung (ggf. beschleunigt),
+# zurückgegeben wird pro URL die letzte bis dahin aufgezeichnete Antwort.
+from base64 import b64decode, b64encode
+from bisect import bisect_right
+from glob import glob
+from gzip import open as gzip_open
+from json import dumps, loads
+from os import getpid, makedirs, path
+from threading import Lock
+from time import strftime, time
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+from loguru import logger
+from requests import Request, Response, get as requests_get
+from requests import exceptions as requests_exceptions
+
+_mode: Optional[str] = None
+_directory = ""
+_speed = 1.0
+_replay_start = 0.0
+
+_lock = Lock()
+_file: Optional[IO[str]] = None
+_file_pid = 0
+_records: Dict[str, Tuple[List[float], List[Dict[str, Any]]]] = {}
+_recording_start = 0.0
+_recording_end = 0.0
+_end_logged = False
+
+
+def install(mode: Optional[str], directory: str, speed: float = 1.0, replay_start: float = 0.0) -> None:
+    # auch als initializer für ProcessPoolExecutor gedacht, deswegen nur einfache Argumente
+    global _mode, _directory, _speed, _replay_start, _file, _records
+    if mode not in {None, "record", "replay"}:
+        raise ValueError(f"unknown recording mode {mode}")
+    _mode = mode
+    _directory = directory
+    _speed = speed
+    _replay_start = replay_start or time()
+    _file = None
+    _records = {}
+    if mode == "replay":
+        _load()
+
+
+def _url(url: str, params: Any) -> str:
+    return Request('GET', url, params=params).prepare().url
+
+
+def get(url: str, **kwargs: Any) -> Response:
+    # Ersatz für requests.get in dm.depdata
+    if _mode == "replay":
+        return _replay(_url(url, kwargs.get('params')))
+    if _mode != "record":
+        return requests_get(url, **kwargs)
+    _t = time()
+    try:
+        r = requests_get(url, **kwargs)
+    except requests_exceptions.RequestException as e:
+        _write({'t': _t, 'url': _url(url, kwargs.get('params')), 'error': e.__class__.__name__, 'message': str(e)})
+        raise
+    record: Dict[str, Any] = {'t': _t, 'url': _url(url, kwargs.get('params')), 'status': r.status_code,
+                              'content_type': r.headers.get('Content-Type'), 'encoding': r.encoding}
+    try:
+        record['text'] = r.content.decode('utf-8')
+    except UnicodeDecodeError:
+        record['b64'] = b64encode(r.content).decode('ascii')
+    _write(record)
+    return r
+
+
+def _write(record: Dict[str, Any]) -> None:
+    global _file, _file_pid
+    with _lock:
+        if _file is None or _file_pid != getpid():
+            makedirs(_directory, exist_ok=True)
+            _file_pid = getpid()
+            _file = gzip_open(path.join(_directory, f"{strftime('%Y%m%d-%H%M%S')}-{_file_pid}.jsonl.gz"), 'at', encoding='utf-8')
+        _file.write(dumps(record, ensure_ascii=False) + "\n")
+        # Sync-Flush, damit die Datei auch bei einem Absturz bis hierhin lesbar bleibt
+        _file.flush()
+
+
+def _load() -> None:
+    global _recording_start, _recording_end
+    _all: List[Dict[str, Any]] = []
+    for _p in sorted(glob(path.join(_directory, "*.jsonl.gz"))):
+        with gzip_open(_p, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        _all.append(loads(line))
+            except EOFError:
+                # letzte Datei evtl. nicht sauber geschlossen
+                logger.warning(f"{_p} truncated, using records up to there")
+    if not _all:
+        raise FileNotFoundError(f"no recorded responses in {_directory}")
+    _all.sort(key=lambda _r: _r['t'])
+    for record in _all:
+        _times, _list = _records.setdefault(record['url'], ([], []))
+        _times.append(record['t'])
+        _list.append(record)
+    _recording_start = _all[0]['t']
+    _recording_end = _all[-1]['t']
+    logger.info(f"replaying {len(_all)} responses for {len(_records)} urls from {_directory}, "
+                f"{(_recording_end - _recording_start) / 60:.1f} min at {_speed}x speed")
+
+
+def replay_time() -> float:
+    # Zeitpunkt innerhalb der Aufzeichnung
+    return _recording_start + (time() - _replay_start) * _speed
+
+
+def _replay(url: str) -> Response:
+    global _end_logged
+    entry = _records.get(url)
+    if entry is None:
+        raise requests_exceptions.ConnectionError(f"no recorded response for {url}")
+    _times, _list = entry
+    _now = replay_time()
+    if _now > _recording_end and not _end_logged:
+        _end_logged = True
+        logger.warning("replay reached end of recording, repeating last responses")
+    record = _list[max(0, bisect_right(_times, _now) - 1)]
+    if 'error' in record:
+        # gleiche Fehlerklasse wie bei der Aufzeichnung, sonst allgemein
+        raise getattr(requests_exceptions, record['error'], requests_exceptions.ConnectionError)(record['message'])
+    r = Response()
+    r.status_code = record['status']
+    r.url = url
+    r.encoding = record['encoding']
+    if record['content_type']:
+        r.headers['Content-Type'] = record['content_type']
+    r._content = record['text'].encode('utf-8') if 'text' in record else b64decode(record['b64'])
+    return r
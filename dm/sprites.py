@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Vorgerasterte Texte: zu (Font, Farbe, Text) wird einmal ein kleines RGB-Bild erzeugt, das danach
+# mit einem SetImage (transp) statt Zeichen für Zeichen mit graphics.DrawText gezeichnet wird.
+# Der Zwischenspeicher ist nach Speicherverbrauch begrenzt und verwirft die am längsten nicht
+# mehr verwendeten Bilder zuerst.
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from . import bdf
+from .backend import FrameCanvas, graphics
+
+_SpriteKey = Tuple[graphics.Font, int, int, int, str]
+
+
+@dataclass
+class TextSprite:
+    # None, wenn der Text keine gesetzten Pixel hat (z. B. nur Leerzeichen)
+    image: Optional[Image.Image]
+    # oberste Zeile des Bildes relativ zur Grundlinie
+    top: int
+    # prefix[i]: Breite von text[:i], wie lines.prefixwidths
+    prefix: List[int]
+    nbytes: int
+
+
+def rasterize(font: bdf.CompiledFont, color: Tuple[int, int, int], text: str) -> TextSprite:
+    glyphs = [font.glyph(ord(c)) for c in text]
+    prefix = list(accumulate((_g.device_width if _g is not None else 0 for _g in glyphs), initial=0))
+    ys = [dy for _g in glyphs if _g is not None for dx, dy in _g.pixels]
+    if not ys or prefix[-1] <= 0:
+        return TextSprite(image=None, top=0, prefix=prefix, nbytes=len(prefix) * 8)
+    top = min(ys)
+    size = (prefix[-1], max(ys) - top + 1)
+    image = Image.new("RGB", size)
+    bdf.draw_text(image.load(), size, font, 0, -top, color, text)
+    return TextSprite(image=image, top=top, prefix=prefix, nbytes=size[0] * size[1] * 3 + len(prefix) * 8)
+
+
+class TextSpriteCache:
+    def __init__(self, max_bytes: int = 1 << 20):
+        self.max_bytes = max_bytes
+        self.sprites: Dict[_SpriteKey, TextSprite] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def resize(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.sprites and self.bytes > self.max_bytes:
+            _key, _sprite = self.sprites.popitem(last=False)
+            self.bytes -= _sprite.nbytes
+            self.evictions += 1
+
+    def get(self, font: graphics.Font, color: graphics.Color, text: str) -> Optional[TextSprite]:
+        # None, wenn für den Font keine BDF-Daten vorliegen (nicht mit drawstuff.loadfont geladen),
+        # der Cache abgeschaltet ist oder schwarz gezeichnet wird (würde mit transp nicht übernommen)
+        _key = (font, color.red, color.green, color.blue, text)
+        _sprite = self.sprites.get(_key)
+        if _sprite is not None:
+            self.sprites.move_to_end(_key)
+            self.hits += 1
+            return _sprite
+        if self.max_bytes <= 0 or not (color.red or color.green or color.blue):
+            return None
+        data = bdf.fontdata(font)
+        if data is None:
+            return None
+        self.misses += 1
+        _sprite = rasterize(data, (color.red, color.green, color.blue), text)
+        if _sprite.nbytes <= self.max_bytes:
+            self.sprites[_key] = _sprite
+            self.bytes += _sprite.nbytes
+            self._evict()
+        return _sprite
+
+    def draw(self, canvas: FrameCanvas, font: graphics.Font, x: int, y: int, color: graphics.Color, text: str,
+             first: int = 0, last: Optional[int] = None) -> int:
+        # wie graphics.DrawText(canvas, font, x, y, color, text[first:last]), gibt auch dieselbe Breite zurück
+        _sprite = self.get(font, color, text)
+        if _sprite is None:
+            return graphics.DrawText(canvas, font, x, y, color, text[first:last])
+        if last is None:
+            last = len(text)
+        left, right = _sprite.prefix[first], _sprite.prefix[last]
+        if _sprite.image is not None and right > left:
+            image = _sprite.image
+            if left > 0 or right < image.size[0]:
+                image = image.crop((left, 0, right, image.size[1]))
+            canvas.SetImage(image, x, y + _sprite.top, True, True)
+        return right - left
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.sprites), "bytes": self.bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+sprites = TextSpriteCache()
+
+
+def drawtext(canvas: FrameCanvas, font: graphics.Font, x: int, y: int, color: graphics.Color, text: str) -> int:
+    # Ersatz für graphics.DrawText über den gemeinsamen Cache
+    return sprites.draw(canvas, font, x, y, color, text)
+
+
+def drawtext_vertical(canvas: FrameCanvas, font: graphics.Font, x: int, y: int, color: graphics.Color, text: str) -> int:
+    # Ersatz für graphics.VerticalDrawText, Zeichen untereinander im Abstand font.height
+    start_y = y
+    for c in text:
+        sprites.draw(canvas, font, x, y, color, c)
+        y += font.height
+    return y - start_y
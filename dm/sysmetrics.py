@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Systemwerte (Temperatur, Laufzeit, CPU-Last, Speicher, Drosselung) für Heartbeat und Aktionen,
+# direkt aus /proc und /sys gelesen statt über Unterprozesse (vcgencmd, uptime, date, awk).
+# Jeder Wert wird ttl Sekunden zwischengespeichert; nicht verfügbare Werte sind None bzw. fehlen in sample().
+from os import path
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Raspberry Pi (Firmware-Treiber), Bitmaske wie vcgencmd get_throttled
+THROTTLED_PATH = "/sys/devices/platform/soc/soc:firmware/get_throttled"
+
+
+def _read(filepath: str) -> str:
+    with open(filepath, "r") as f:
+        return f.read()
+
+
+def format_uptime(seconds: float) -> str:
+    # wie "uptime -p" ohne "up "
+    minutes = int(seconds // 60)
+    parts = []
+    for name, length in (("week", 7*24*60), ("day", 24*60), ("hour", 60), ("minute", 1)):
+        count, minutes = divmod(minutes, length)
+        if count:
+            parts.append(f"{count} {name}{'s' if count != 1 else ''}")
+    return ", ".join(parts) or "0 minutes"
+
+
+class SystemSampler:
+    def __init__(self, ttl: float = 5.0, root: str = "/", clock: Callable[[], float] = monotonic):
+        self.ttl = ttl
+        self.root = root
+        self.clock = clock
+        self._values: Dict[str, Tuple[float, Any]] = {}
+        # letzte Zeile "cpu" aus /proc/stat für die Last seit dem vorigen Aufruf
+        self._cpu: Optional[Tuple[int, int]] = None
+
+    def _path(self, filepath: str) -> str:
+        return path.join(self.root, filepath.lstrip("/"))
+
+    def _cached(self, name: str, fn: Callable[[], Any]) -> Any:
+        now = self.clock()
+        _entry = self._values.get(name)
+        if _entry is not None and now - _entry[0] < self.ttl:
+            return _entry[1]
+        try:
+            value = fn()
+        except (OSError, ValueError, IndexError):
+            value = None
+        self._values[name] = (now, value)
+        return value
+
+    def temperature(self) -> Optional[float]:
+        # °C
+        return self._cached("temperature", lambda: int(_read(self._path("/sys/class/thermal/thermal_zone0/temp"))) / 1000)
+
+    def uptime(self) -> Optional[float]:
+        # Sekunden
+        return self._cached("uptime", lambda: float(_read(self._path("/proc/uptime")).split()[0]))
+
+    def boot_time(self) -> Optional[int]:
+        # Unix-Zeitstempel des Systemstarts
+        def _boot_time() -> int:
+            for line in _read(self._path("/proc/stat")).splitlines():
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+            raise ValueError("no btime in /proc/stat")
+        return self._cached("boot_time", _boot_time)
+
+    def cpu_usage(self) -> Optional[float]:
+        # Anteil (0..1) nicht untätiger CPU-Zeit seit dem vorigen Aufruf, beim ersten Aufruf seit dem Systemstart
+        def _cpu_usage() -> float:
+            fields = [int(_v) for _v in _read(self._path("/proc/stat")).splitlines()[0].split()[1:]]
+            # idle + iowait
+            total, idle = sum(fields), fields[3] + (fields[4] if len(fields) > 4 else 0)
+            prev_total, prev_idle = self._cpu or (0, 0)
+            self._cpu = (total, idle)
+            if total <= prev_total:
+                raise ValueError("no cpu time elapsed")
+            return 1 - (idle - prev_idle) / (total - prev_total)
+        return self._cached("cpu_usage", _cpu_usage)
+
+    def loadavg(self) -> Optional[Tuple[float, float, float]]:
+        return self._cached("loadavg", lambda: tuple(float(_v) for _v in _read(self._path("/proc/loadavg")).split()[:3]))
+
+    def memory(self) -> Optional[Tuple[int, int]]:
+        # (gesamt, verfügbar) in kB
+        def _memory() -> Tuple[int, int]:
+            values = {}
+            for line in _read(self._path("/proc/meminfo")).splitlines():
+                name, _, rest = line.partition(":")
+                if name in {"MemTotal", "MemAvailable"}:
+                    values[name] = int(rest.split()[0])
+            return values["MemTotal"], values["MemAvailable"]
+        return self._cached("memory", _memory)
+
+    def throttled(self) -> Optional[int]:
+        return self._cached("throttled", lambda: int(_read(self._path(THROTTLED_PATH)).strip(), 16))
+
+    def sample(self) -> Dict[str, str]:
+        # für system_data im Heartbeat, Schlüssel temperature_cpu und uptime im bisherigen Format
+        data: Dict[str, str] = {}
+        if (temperature := self.temperature()) is not None:
+            data["temperature_cpu"] = f"{temperature:.1f}'C"
+        if (uptime := self.uptime()) is not None:
+            data["uptime"] = format_uptime(uptime)
+        if (cpu_usage := self.cpu_usage()) is not None:
+            data["cpu_usage"] = f"{cpu_usage*100:.1f} %"
+        if (loadavg := self.loadavg()) is not None:
+            data["loadavg"] = " ".join(f"{_v:.2f}" for _v in loadavg)
+        if (memory := self.memory()) is not None:
+            data["memory"] = f"{(memory[0]-memory[1])//1024}/{memory[0]//1024} MB"
+        if (throttled := self.throttled()) is not None:
+            data["throttled"] = hex(throttled)
+        return data
+
+
+sampler = SystemSampler()
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+from random import uniform
+from time import localtime, monotonic, perf_counter, sleep, struct_time, time
+from typing import Callable, Deque, Dict, Iterator, Optional, Union
+
+
+class FrameScheduler:
+    # Taktgeber für die Hauptschleife: jedes Bild hat ein festes Zeitbudget (period),
+    # geschlafen wird nur für den Rest davon. Verspätete Bilder werden aufgeholt,
+    # indem die folgenden Bilder ohne Pause gerendert werden; liegt die Schleife
+    # mehr als max_lag Bilder zurück, werden diese verworfen und der Takt neu angesetzt.
+    def __init__(self, period: float, max_lag: int = 5,
+                 clock: Callable[[], float] = monotonic, sleepfn: Callable[[float], None] = sleep):
+        self.period = period
+        self.max_lag = max_lag
+        self.clock = clock
+        self.sleepfn = sleepfn
+
+        self.deadline: float = 0.0
+        self.started = False
+        self.frames = 0
+        self.late = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        self.deadline = self.clock() + self.period
+        self.started = True
+
+    def wait(self) -> int:
+        # am Ende jedes Bildes aufrufen, gibt die Anzahl verworfener Bilder zurück
+        self.frames += 1
+        if self.period <= 0:
+            return 0
+        if not self.started:
+            self.start()
+        now = self.clock()
+        remaining = self.deadline - now
+        if remaining > 0:
+            self.sleepfn(remaining)
+            self.deadline += self.period
+            return 0
+        self.late += 1
+        behind = int(-remaining // self.period)
+        if behind >= self.max_lag:
+            self.dropped += behind
+            self.deadline = now + self.period
+            return behind
+        self.deadline += self.period
+        return 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"frames": self.frames, "late": self.late, "dropped": self.dropped}
+
+
+class FrameClock:
+    # Einmal pro Bild abgelesene Zeit für alle Zeilen und Bereiche (Uhrzeit, Countdowns), außerdem
+    # die Zeitbasis für Lauftexte und Blinken: wie weit gescrollt wird und ob gerade die Blinkphase an ist,
+    # ergibt sich aus der Zeit statt aus der Anzahl gerenderter Bilder, bei verworfenen oder verspäteten
+    # Bildern wird also nicht langsamer gescrollt. Mit synced wird time() statt monotonic() verwendet;
+    # bei per NTP synchronisierten Uhren blinken dann mehrere Anzeigen (gleiche Einstellungen) im Gleichtakt,
+    # die Position der Lauftexte hängt weiterhin davon ab, wann ihr Inhalt angezeigt wurde.
+    def __init__(self, step: float, blink_period: float, synced: bool = False, max_steps: int = 50,
+                 clock: Optional[Callable[[], float]] = None, wallclock: Callable[[], float] = time):
+        self.step = step
+        self.blink_period = blink_period
+        self.synced = synced
+        self.max_steps = max_steps
+        self.wallclock = wallclock
+        self.clock = clock or (wallclock if synced else monotonic)
+
+        self.epoch: Optional[float] = None
+        self.now = 0.0
+        self.count = 0
+        # Scrollschritte seit dem vorigen tick()
+        self.steps = 1
+        # Systemzeit des aktuellen Bildes
+        self.time = 0.0
+        self.localtime: struct_time = localtime(0)
+
+    def tick(self) -> None:
+        # einmal pro Bild vor dem Rendern aufrufen
+        now = self.clock()
+        self.time = now if self.clock is self.wallclock else self.wallclock()
+        self.localtime = localtime(self.time)
+        if self.epoch is None:
+            # ohne Synchronisation liegen die Bilder so mittig zwischen zwei Schritten,
+            # kleine Schwankungen beim Aufwachen ändern dann nichts an der Schrittzahl
+            self.epoch = 0.0 if self.synced else now - self.step / 2
+            self.count = int((now - self.epoch) // self.step) if self.step > 0 else 0
+        self.now = now
+        if self.step <= 0:
+            self.steps = 1
+            return
+        count = int((now - self.epoch) // self.step)
+        steps = count - self.count
+        self.count = count
+        # Zeitsprünge (Uhr gestellt, Prozess lange angehalten): nicht ewig nachscrollen
+        self.steps = steps if 0 <= steps <= self.max_steps else 1
+
+    def blinkon(self) -> bool:
+        if self.blink_period <= 0:
+            return True
+        return (self.now - (self.epoch or 0.0)) % self.blink_period < self.blink_period / 2
+
+
+class RefreshScheduler:
+    # Datenaktualisierung nach Uhrzeit statt nach Darstellungsschritten:
+    # kurz nach jedem Minutenwechsel (dann ändern sich die Countdowns) und dazwischen
+    # alle interval Sekunden. splay verschiebt alle Zeitpunkte um einen zufälligen,
+    # pro Gerät festen Wert, damit nicht alle Anzeigen in derselben Sekunde abfragen.
+    def __init__(self, interval: float, minute_offset: float = 2.0, splay: float = 0.0,
+                 clock: Callable[[], float] = time, rand: Callable[[float, float], float] = uniform):
+        self.interval = interval
+        self.minute_offset = minute_offset
+        self.splay = rand(0, splay) if splay > 0 else 0.0
+        self.clock = clock
+
+        self.offset = self.minute_offset + self.splay
+        self.minutes = max(1, round(self.interval / 60)) if self.interval >= 60 else 1
+        self.maxwait = self.minutes*60 + self.offset
+        self.last: Optional[float] = None
+        self.next: Optional[float] = None
+
+    def _points(self, minute_start: float) -> Iterator[float]:
+        _p = minute_start + self.offset
+        yield _p
+        if 0 < self.interval < 60:
+            # kein Zeitpunkt kurz vor dem nächsten Minutenwechsel
+            _p += self.interval
+            while _p < minute_start + 60 + self.offset - self.interval/4:
+                yield _p
+                _p += self.interval
+
+    def next_after(self, now: float) -> float:
+        minute_start = now - (now % 60)
+        _m = minute_start - 60*(1 + int(self.offset // 60))
+        while True:
+            if (_m // 60) % self.minutes == 0:
+                for _p in self._points(_m):
+                    if _p > now:
+                        return _p
+            _m += 60
+
+    def due(self) -> bool:
+        now = self.clock()
+        # erstes Mal sofort, außerdem bei Zeitsprüngen (z. B. nach NTP-Synchronisation) neu ansetzen
+        if self.next is None or self.next - now > self.maxwait:
+            return True
+        return now >= self.next
+
+    def started(self) -> None:
+        now = self.clock()
+        self.last = now
+        self.next = self.next_after(now)
+
+    def progress(self) -> float:
+        # Anteil der bis zur nächsten Aktualisierung verstrichenen Zeit, für den Fortschrittsbalken
+        if self.last is None or self.next is None or self.next <= self.last:
+            return 0.0
+        return min(1.0, max(0.0, (self.clock() - self.last) / (self.next - self.last)))
+
+
+class _Stage:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples: Deque[float]):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.samples.append(perf_counter() - self.start)
+
+
+class StageTimer:
+    # Laufzeiten einzelner Abschnitte der Hauptschleife, jeweils die letzten window Messwerte.
+    # Perzentile werden erst bei summary() berechnet, pro Messung fällt nur perf_counter() und append an.
+    enabled = True
+
+    def __init__(self, window: int = 2000):
+        self.window = window
+        self.stages: Dict[str, _Stage] = {}
+        self.counters: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+    def stage(self, name: str) -> _Stage:
+        _stage = self.stages.get(name)
+        if _stage is None:
+            _stage = self.stages[name] = _Stage(deque(maxlen=self.window))
+        return _stage
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stage(name).samples.append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        # Werte in ms
+        result: Dict[str, Dict[str, Union[int, float]]] = {}
+        for name, _stage in self.stages.items():
+            _s = sorted(_stage.samples)
+            if not _s:
+                continue
+            _n = len(_s)
+            result[name] = {
+                "n": _n,
+                "p50": round(_s[(_n - 1) * 50 // 100] * 1000, 3),
+                "p95": round(_s[(_n - 1) * 95 // 100] * 1000, 3),
+                "p99": round(_s[(_n - 1) * 99 // 100] * 1000, 3),
+                "max": round(_s[-1] * 1000, 3),
+            }
+        for name, counterfn in self.counters.items():
+            result[name] = counterfn()
+        return result
+
+    def logstr(self) -> str:
+        lines = []
+        for name, values in self.summary().items():
+            if "p50" in values:
+                lines.append(f"{name:<16} n={values['n']:<5} p50={values['p50']:.2f} p95={values['p95']:.2f} p99={values['p99']:.2f} max={values['max']:.2f} ms")
+            else:
+                lines.append(f"{name:<16} " + " ".join(f"{_k}={_v}" for _k, _v in values.items()))
+        return "\n".join(lines)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+class NullStageTimer(StageTimer):
+    enabled = False
+    _stage = _NullStage()
+
+    def __init__(self):
+        super().__init__(window=0)
+
+    def stage(self, name: str) -> _NullStage:  # type: ignore[override]
+        return self._stage
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
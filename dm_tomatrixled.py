@@ -11,23 +11,30 @@ from requests import get, post
 from itertools import cycle
 from json import dumps
 from json import load as json_load
-from subprocess import check_output
-from sys import stderr, stdout
+from os import remove
+from sys import stderr
 from tempfile import NamedTemporaryFile
-from time import localtime, sleep  # , monotonic
+from time import localtime, monotonic, perf_counter, sleep, strftime, time
 from typing import List, Iterable, Tuple, Optional, NoReturn, Union, Callable, Sequence
 
 from ansi2html import Ansi2HTMLConverter
 from loguru import logger
 from PIL import Image
-from rgbmatrix import RGBMatrix, RGBMatrixOptions, graphics
-from rgbmatrix.core import FrameCanvas
 
 import dm
 from dm.actions import check_action
-from dm.drawstuff import clockstr_tt, colorppm
-from dm.areas import rightbar_wide, rightbar_tmp, rightbar_verticalclock, startscreen
-from dm.lines import MultisymbolScrollline, SimpleScrollline, LinenumOptions, CountdownOptions, PlatformOptions, RealtimeColors, StandardDepartureLine, textpx
+from dm.bundle import open_bundle
+from dm.caches import caches
+from dm.backend import BACKEND, FrameCanvas, RGBMatrix, RGBMatrixOptions, graphics
+from dm.drawstuff import clockstr_tt, loadfont
+from dm.frameout import PPMWriter, frame_rgb, scratchpath
+from dm.framering import FrameRing
+from dm import bdf, recording
+from dm.areas import CachedArea, ClockText, rightbar_wide, rightbar_tmp, rightbar_verticalclock, startscreen
+from dm.sprites import drawtext, sprites
+from dm.sysmetrics import sampler as system_sampler
+from dm.lines import MultisymbolScrollline, SimpleScrollline, LinenumOptions, CountdownOptions, PlatformOptions, RealtimeColors, StandardDepartureLine, retext_letters, retext_letters_number, textpx
+from dm.timing import FrameClock, FrameScheduler, RefreshScheduler, StageTimer, NullStageTimer
 from dm.depdata import CallableWithKwargs, DataSource, Departure, Meldung, MOT, trainTMOTefa, trainMOT, linenumpattern, GetdepsEndAll, getdeps, getefadeps, getfptfrestdeps, getextmsgdata, getlocalmsg, getlocaldeps, getrssfeed, getnina, getkvbmonitor
 
 
@@ -46,6 +53,9 @@ parser.add_argument("--config-system-key", action="store", help="API key of Anze
 parser.add_argument("--ext-data-url", action="store", help="URL to dfi_data endpoint of optional configuration system see dfi.d3d9.xyz", default="", type=str)
 parser.add_argument("--save-msg-path", action="store", help="file path to store/load texts from ext-data as a backup option", default="./log/saved_msg.json", type=str)
 parser.add_argument("--local-deps", action="store", help="file path to local csv with departures, cmdline option only applied if EFA (not DB/BVG/..) is used", default="", type=str)
+parser.add_argument("--record", action="store", help="Record all responses of the data sources (EFA, db-rest, NINA, ext-data, RSS, ...) as compressed files in this directory", default="", type=str)
+parser.add_argument("--replay", action="store", help="Serve responses recorded with --record from this directory instead of requesting the servers", default="", type=str)
+parser.add_argument("--replay-speed", action="store", help="Speed factor for --replay, e.g. 10 to go through the recording ten times faster. Default: 1", default=1.0, type=float)
 
 parser.add_argument("-e", "--enable-efamessages", action="store_true", help="Enable line messages. (still overwritten by -m option)")
 parser.add_argument("-m", "--message", action="store", help="Message to scroll at the bottom. Default: none", default="", type=str)
@@ -86,8 +96,26 @@ parser.add_argument("--small-linenum", action="store_true", help="Show line numb
 parser.add_argument("--small-text", action="store_true", help="Show destination, stop name, message with smaller letters")
 parser.add_argument("--small-countdown", action="store_true", help="Show countdown with smaller numbers")
 parser.add_argument("--small-platform", action="store_true", help="Show platform with smaller numbers/letters")
-parser.add_argument("--update-steps", action="store", help="Loop steps until reload of data. Default: 600", default=600, type=int)
-parser.add_argument("--sleep-interval", action="store", help="Sleep interval (inside the main loop). Default: 0.03", default=0.03, type=float)
+parser.add_argument("--no-static-layers", action="store_true", help="Draw line number, destination and platform of departure lines on every frame instead of caching them as an image per departure")
+parser.add_argument("--text-sprite-cache", action="store", help="Memory in KiB for pre-rendered text images (clock, countdowns, scrolling text), 0 to draw all text directly. Default: 1024", default=1024, type=int)
+parser.add_argument("--width-cache", action="store", help="Number of texts whose character positions are kept for measuring and cutting text. Default: 256", default=256, type=int)
+parser.add_argument("--fittext-cache", action="store", help="Number of fitted line numbers/platforms (font, shortened text) that are kept. Default: 64", default=64, type=int)
+parser.add_argument("--tint-cache", action="store", help="Number of symbols recolored (e.g. into a realtime color) that are kept. Default: 64", default=64, type=int)
+parser.add_argument("--font-cache", action="store", help="Directory for compiled fonts (see dm/bdf.py), keyed by hash of the BDF file, used for fonts not in the resource bundle. Empty to compile at every start. Default: ./cache/fonts", default="./cache/fonts", type=str)
+parser.add_argument("--resource-bundle", action="store", help="Precompiled fonts and images (see dm/bundle.py), rebuilt automatically when res/ changes, empty to load everything from res/ directly. Default: res.bundle", default="res.bundle", type=str)
+parser.add_argument("--message-strip", action="store_true", help="Render all messages once into one wide image when they change and scroll a window over it, instead of drawing the visible part of every message on each frame")
+parser.add_argument("--update-steps", action="store", help="Loop steps between heartbeats and icon changes, also used for the default of --update-interval. Default: 600", default=600, type=int)
+parser.add_argument("--update-interval", action="store", help="Seconds between data reloads within a minute, additionally to the reload shortly after each new minute. Default: --sleep-interval * --update-steps", type=float)
+parser.add_argument("--update-minute-offset", action="store", help="Seconds after each new minute at which data is reloaded. Default: 2", default=2, type=float)
+parser.add_argument("--update-splay", action="store", help="Maximum random delay in seconds added to all reload times, chosen once at startup, so that multiple displays do not load data at the same time. Default: 5", default=5, type=float)
+parser.add_argument("--sleep-interval", action="store", help="Target frame period (inside the main loop), only the time left after rendering is slept. Default: 0.03", default=0.03, type=float)
+parser.add_argument("--scroll-step", action="store", help="Seconds per pixel of scrolling text, independent of the actual frame rate. Default: --sleep-interval", type=float)
+parser.add_argument("--blink-period", action="store", help="Seconds for one on/off cycle of blinking countdowns. Default: 60 * --sleep-interval", type=float)
+parser.add_argument("--synced-clock", action="store_true", help="Derive the blink phase from the system time instead of the time since start, so that multiple displays with synchronized clocks and the same settings blink in step (scroll positions are not synchronized)")
+parser.add_argument("--frame-stats", action="store_true", help="Measure the duration of each stage of the main loop and log percentiles periodically")
+parser.add_argument("--frame-stats-interval", action="store", help="Seconds between logging of --frame-stats. Default: 60", default=60, type=float)
+parser.add_argument("--frame-stats-heartbeat", action="store_true", help="Include a summary of --frame-stats in the detailed heartbeats sent to the configuration system")
+parser.add_argument("--max-frame-lag", action="store", help="Frames the main loop may fall behind and catch up on before they are dropped. Default: 5", default=5, type=int)
 parser.add_argument("--limit-multiplier", action="store", help="How many extra departures (value * actual limit) to load (useful for stops with a lot of departures where a few delays might \"hide\" earlier departures. Default: 3", default=3, type=int)
 
 parser.add_argument("--nina-url", action="store", help="NINA API dashboard base URL", default="", type=str)
@@ -99,7 +127,9 @@ parser.add_argument("--nina-ignore-id", action="append", help="NINA API ignore t
 # matrix settings
 parser.add_argument("-c", "--led-chain", action="store", help="Daisy-chained boards. Default: 2.", default=2, type=int)
 parser.add_argument("-b", "--led-brightness", action="store", help="Sets brightness level. Default: 30. Range: 1..100", default=30, type=int)
-parser.add_argument("--write-ppm", action="store", help="Write binary ppm to given file name every loop", default="", type=str)
+parser.add_argument("--write-ppm", action="store", help="Write binary ppm to given file name (in a background thread, replaced atomically unless it is a FIFO). With {n} in the name, e.g. frames/{n:08}.ppm, every frame is kept as a numbered file", default="", type=str)
+parser.add_argument("--frame-ring", action="store", help="Publish every frame into a shared memory ring buffer at this path (e.g. /dev/shm/dm_frames), see ppmtools/ppmtest.py", default="", type=str)
+parser.add_argument("--write-ppm-rate", action="store", help="Maximum frames per second written with --write-ppm, 0 for every frame. Default: 10", default=10.0, type=float)
 parser.add_argument("--led-rows", action="store", help="Display rows. 16 for 16x32, 32 for 32x32. Default: 32", default=32, type=int)
 parser.add_argument("--led-cols", action="store", help="Panel columns. Typically 32 or 64. (Default: 64)", default=64, type=int)
 parser.add_argument("--led-parallel", action="store", help="For Plus-models or RPi2: parallel chains. 1..3. Default: 1", default=1, type=int)
@@ -125,9 +155,19 @@ if args.min_negativedelay > -1:
     parser.error("--min-negativedelay must be <= -1")
 if args.max_minutes < -1:
     parser.error("--max-minutes must be >= -1")
+if args.update_interval is None:
+    args.update_interval = args.sleep_interval*args.update_steps
+if args.scroll_step is None:
+    args.scroll_step = args.sleep_interval
+if args.blink_period is None:
+    args.blink_period = 60*args.sleep_interval
+if args.record and args.replay:
+    parser.error("--record and --replay can not be used together")
+if args.replay_speed <= 0:
+    parser.error("--replay-speed must be > 0")
 
 min_timeout = 10
-servertimeout = max(min_timeout, (args.sleep_interval*args.update_steps)/2)
+servertimeout = max(min_timeout, args.update_interval/2)
 
 CONFIG_SYSTEM = False
 SYSTEM_URL = args.config_system_url
@@ -141,25 +181,17 @@ else:
 
 _ansi_html = Ansi2HTMLConverter(inline=True)
 
-def heartbeat_request(url, dfi_id, key, log=[], get_system_data=tuple(), loaded_data={}, going_offline=False):
+def heartbeat_request(url, dfi_id, key, log=[], system_data={}, loaded_data={}, frame_stats={}, going_offline=False):
     # global config_version
     payload = {"action": "dfi_heartbeat", "id": dfi_id, "key": key} #  , "config_version": dm.config.version}
     if log:
         payload["log"] = log if log == "unchanged" else  _ansi_html.convert("".join(log), full=False)
-    if get_system_data:
-        system_data = {}
-        command = lambda input: check_output(input + " 2>/dev/null", shell=True).decode(stdout.encoding).strip()
-        for key in get_system_data:
-            value = None
-            if key == "temperature_cpu":
-                value = command("vcgencmd measure_temp | sed -e 's/temp=//'")
-            elif key == "uptime":
-                value = command("uptime -p | sed -e 's/up //'")
-            if value is not None:
-                system_data[key] = str(value)
+    if system_data:
         payload["system_data"] = dumps(system_data)
     if loaded_data:
         payload["loaded_data"] = dumps(loaded_data)
+    if frame_stats:
+        payload["frame_stats"] = dumps(frame_stats)
     if going_offline:
         payload["going_offline"] = 1
     r = post(url, timeout=servertimeout, data=payload)
@@ -227,7 +259,22 @@ options.drop_privileges = 0
 FORK = True  # d3d9/rpi-rgb-led-matrix fork
 writeppm = bool(args.write_ppm)
 ppmfile = args.write_ppm
-options.pixelsvector = writeppm
+try:
+    ppmwriter = PPMWriter(ppmfile, args.write_ppm_rate) if writeppm else None
+except ValueError as e:
+    parser.error(f"--write-ppm: {e}")
+# wird in __main__ mit der Größe der Matrix angelegt und bleibt über Neustarts von loop() erhalten
+framering: Optional[FrameRing] = None
+# für canvas.ppm(), gemeinsam für --write-ppm und --frame-ring
+frame_scratch = scratchpath("frame")
+# Pixelspeicher für canvas.ppm() im Fork, sonst liefern --write-ppm und --frame-ring keine Bilder
+readframes = writeppm or bool(args.frame_ring)
+options.pixelsvector = readframes
+sprites.resize(args.text_sprite_cache * 1024)
+caches["prefixwidths"].resize(args.width_cache)
+caches["fittext"].resize(args.fittext_cache)
+caches["tinted"].resize(args.tint_cache)
+bdf.cachedir = args.font_cache or None
 
 '''
 gpiotest = False
@@ -239,26 +286,6 @@ if gpiotest:
 
 resources_dir = "./res/"
 
-### Fonts
-
-fontdir = f"{resources_dir}bdf/"
-fontmin = graphics.Font()
-fontmin.LoadFont(f"{fontdir}tom-thumb.bdf")
-fontnum = graphics.Font()
-fontnum.LoadFont(f"{fontdir}4x6.bdf")
-fontlargernum = graphics.Font()
-fontlargernum.LoadFont(f"{fontdir}5x7-mod.bdf")
-propfont = graphics.Font()
-propfont.LoadFont(f"{fontdir}uwe_prop_mod.bdf")
-
-fontnormal = propfont if not args.no_prop else fontlargernum
-fontsmall = fontnum
-
-fontlinenum = fontsmall if args.small or args.small_linenum else fontnormal
-fonttext = fontsmall if args.small or args.small_text else fontnormal
-fontcountdown = fontsmall if args.small or args.small_countdown else fontnormal
-fontplatform = fontsmall if args.small or args.small_platform else fontnormal
-
 ### Colors
 
 # matrixbgColor_t = (0, 16, 19)
@@ -283,19 +310,55 @@ else:
     linebgColor = graphics.Color(0, 8, 9)
 linefgColor = textColor
 
+### Ressourcen
+
+# vorkompiliert (dm/bundle.py): BDF-Daten der Schriften, alle Bilder und die in den Echtzeitfarben eingefärbten weißen Symbole
+startup_start = perf_counter()
+startup_times = {}
+_t = startup_start
+_tints = [(_c.red, _c.green, _c.blue) for _c in (getattr(realtimecolors, f.name) for f in fields(realtimecolors)) if _c is not None]
+bundle = open_bundle(args.resource_bundle, resources_dir, _tints) if args.resource_bundle else None
+if bundle is not None:
+    bundle.provide_fonts()
+startup_times["bundle"] = perf_counter() - _t
+
+
+def loadppm(name: str) -> Image.Image:
+    return bundle.image(f"ppm/{name}") if bundle is not None else Image.open(f"{ppmdir}{name}")
+
+
+### Fonts
+
+_t = perf_counter()
+fontdir = f"{resources_dir}bdf/"
+fontmin = loadfont(f"{fontdir}tom-thumb.bdf")
+fontnum = loadfont(f"{fontdir}4x6.bdf")
+fontlargernum = loadfont(f"{fontdir}5x7-mod.bdf")
+propfont = loadfont(f"{fontdir}uwe_prop_mod.bdf")
+
+fontnormal = propfont if not args.no_prop else fontlargernum
+fontsmall = fontnum
+
+fontlinenum = fontsmall if args.small or args.small_linenum else fontnormal
+fonttext = fontsmall if args.small or args.small_text else fontnormal
+fontcountdown = fontsmall if args.small or args.small_countdown else fontnormal
+fontplatform = fontsmall if args.small or args.small_platform else fontnormal
+startup_times["fonts"] = perf_counter() - _t
+
 ### PPM
 
+_t = perf_counter()
 ppmdir = f"{resources_dir}ppm/"
-ppm_info = Image.open(f"{ppmdir}icon-info.ppm")
-ppm_warn = Image.open(f"{ppmdir}icon-warn.ppm")
-ppm_stop = Image.open(f"{ppmdir}icon-stop.ppm")
-ppm_smile = Image.open(f"{ppmdir}icon-smile.ppm")
-ppm_ad = Image.open(f"{ppmdir}icon-ad.ppm")
-ppm_delay = Image.open(f"{ppmdir}icon-delay.ppm")
-ppm_earlyterm = Image.open(f"{ppmdir}icon-earlyterm.ppm")
-ppm_no_rt = Image.open(f"{ppmdir}icon-no-rt.ppm")
-ppm_no_deps = Image.open(f"{ppmdir}icon-no-deps.ppm")
-ppm_fhswf = Image.open(f"{ppmdir}icon-fhswf.ppm")
+ppm_info = loadppm("icon-info.ppm")
+ppm_warn = loadppm("icon-warn.ppm")
+ppm_stop = loadppm("icon-stop.ppm")
+ppm_smile = loadppm("icon-smile.ppm")
+ppm_ad = loadppm("icon-ad.ppm")
+ppm_delay = loadppm("icon-delay.ppm")
+ppm_earlyterm = loadppm("icon-earlyterm.ppm")
+ppm_no_rt = loadppm("icon-no-rt.ppm")
+ppm_no_deps = loadppm("icon-no-deps.ppm")
+ppm_fhswf = loadppm("icon-fhswf.ppm")
 
 meldungicons = {
     "info": ppm_info,
@@ -312,21 +375,19 @@ meldungicons = {
 
 symtextoffset = fonttext.height-fonttext.baseline
 
-ppm_whitemin = Image.open(f"{ppmdir}white-min.ppm")
-_rtcolors = filter(lambda _: _ is not None, set(getattr(realtimecolors, f.name) for f in fields(realtimecolors)))
-ppmmincolordict = {_color: colorppm(ppm_whitemin, _color) for _color in _rtcolors}
+ppm_whitemin = loadppm("white-min.ppm")
 
 supportedcdlhs = (6, 7)
 defaultppmcdlh = 6
 ppmcdh = fontcountdown.height - 1
 ppmcdh = ppmcdh if ppmcdh in supportedcdlhs else defaultppmcdlh
-ppm_whitebus = Image.open(f"{ppmdir}white-bus{ppmcdh}.ppm")
-ppm_whitetrain = Image.open(f"{ppmdir}white-train{ppmcdh}.ppm")
-ppm_whitehispeed = Image.open(f"{ppmdir}white-hispeed{ppmcdh}.ppm")
-ppm_whitetram = Image.open(f"{ppmdir}white-tram{ppmcdh}.ppm")
-ppm_whitehanging = Image.open(f"{ppmdir}white-hanging{ppmcdh}.ppm")
+ppm_whitebus = loadppm(f"white-bus{ppmcdh}.ppm")
+ppm_whitetrain = loadppm(f"white-train{ppmcdh}.ppm")
+ppm_whitehispeed = loadppm(f"white-hispeed{ppmcdh}.ppm")
+ppm_whitetram = loadppm(f"white-tram{ppmcdh}.ppm")
+ppm_whitehanging = loadppm(f"white-hanging{ppmcdh}.ppm")
 
-ppm_whitesofort = Image.open(f"{ppmdir}white-sofort.ppm")
+ppm_whitesofort = loadppm("white-sofort.ppm")
 sofort = False  # Alternative: Option zerosofort von CountdownOptions, ggf. Schrift anpassen
 
 if sofort:
@@ -339,14 +400,13 @@ else:
                   MOT.HANGING: ppm_whitehanging,
                   }
 
-ppmmotcolordict = {mot: {_color: colorppm(ppm, _color) for _color in ppmmincolordict.keys()} for mot, ppm in ppmmotdict.items()}
-
-ppm_vrr = Image.open(f"{ppmdir}matrix13x13vrr-engebuchstaben-2.ppm").convert('RGB')
-ppm_db11 = Image.open(f"{ppmdir}dbkeks.ppm").convert('RGB')
-ppm_sonne11 = Image.open(f"{ppmdir}sonne.ppm").convert('RGB')
-ppm_wolke11 = Image.open(f"{ppmdir}wolke.ppm").convert('RGB')
-ppm_wolkesonne11 = Image.open(f"{ppmdir}wolke mit sonne.ppm").convert('RGB')
-ppm_wolkeregen11 = Image.open(f"{ppmdir}wolke mit regen.ppm").convert('RGB')
+ppm_vrr = loadppm("matrix13x13vrr-engebuchstaben-2.ppm").convert('RGB')
+ppm_db11 = loadppm("dbkeks.ppm").convert('RGB')
+ppm_sonne11 = loadppm("sonne.ppm").convert('RGB')
+ppm_wolke11 = loadppm("wolke.ppm").convert('RGB')
+ppm_wolkesonne11 = loadppm("wolke mit sonne.ppm").convert('RGB')
+ppm_wolkeregen11 = loadppm("wolke mit regen.ppm").convert('RGB')
+startup_times["icons"] = perf_counter() - _t
 
 ### linenum, countdown, platform
 
@@ -362,11 +422,11 @@ linenumopt = LinenumOptions(
     bgColor=linebgColor,
     fgColor=textColor,
     pattern=linenumpattern,
-    retext_1=lambda _s: _s.group(1)+_s.group(2),
-    retext_2=lambda _s: _s.group(1))
+    retext_1=retext_letters_number,
+    retext_2=retext_letters)
 
 longausfall = True
-ppm_ausfall = Image.open(f"{ppmdir}red-ausfall{'-long' if longausfall else ''}.ppm")
+ppm_ausfall = loadppm(f"red-ausfall{'-long' if longausfall else ''}.ppm")
 # ppm_ausfall wird nur genutzt, wenn als Option cancelled_symbol von CountdownOptions angegeben.
 # Neues Standardverhalten: "entfällt" blinkt abwechselnd mit Zieltext, Countdown zeigt absolute geplante Abfahrtszeit
 
@@ -374,9 +434,7 @@ countdownopt = CountdownOptions(
     font=fontcountdown,
     realtime_colors=realtimecolors,
     mot_symbols=ppmmotdict,
-    mot_coloured_symbols=ppmmotcolordict,
     min_symbol=ppm_whitemin,
-    min_coloured_symbols=ppmmincolordict,
     mindelay=args.min_delay,
     minslightdelay=args.min_slightdelay,
     minnegativedelay=args.min_negativedelay,
@@ -525,6 +583,9 @@ class Display:
             progressColor: graphics.Color,
             bgColor_t: Optional[Tuple[int, int, int]],
             update_step: int,
+            refresh: RefreshScheduler,
+            clock: FrameClock,
+            timer: StageTimer,
             depcolumns: Sequence[Tuple[int, int]],
             depcolumns_zigzag: bool,
             deplines: List[StandardDepartureLine],
@@ -547,6 +608,9 @@ class Display:
         self.progressColor = progressColor
         self.bgColor_t = bgColor_t
         self.update_step = update_step
+        self.refresh = refresh
+        self.clock = clock
+        self.timer = timer
         self.depcolumns = depcolumns
         self.depcolumns_zigzag = depcolumns_zigzag
         self.deplines = deplines
@@ -554,6 +618,7 @@ class Display:
         self.stop_scroller = stop_scroller
         self.after_stop_lineheight = after_stop_lineheight
         self.clock_in_header = clock_in_header
+        self.headerclock = ClockText(clockstr_tt)
         self.meldung_scroller = meldung_scroller
         self.after_meldung_lineheight = after_meldung_lineheight
 
@@ -743,7 +808,14 @@ class Display:
             else:
                 hb_args["log"] = "unchanged"
             if not self.heartbeat_detail_skip_remaining:
-                hb_args["get_system_data"] = ("temperature_cpu", "uptime")
+                # im Hauptprozess gelesen (nur Dateien in /proc und /sys), CPU-Last dann seit dem vorigen Heartbeat
+                system_data = system_sampler.sample()
+                frames = self.timer.counters.get("frames")
+                if frames is not None:
+                    system_data["frames"] = " ".join(f"{_k}={_v}" for _k, _v in frames().items())
+                hb_args["system_data"] = system_data
+                if args.frame_stats_heartbeat and self.timer.enabled:
+                    hb_args["frame_stats"] = self.timer.summary()
                 # hb_args["loaded_data"] = ...
                 self.heartbeat_detail_skip_remaining = self.heartbeat_detail_skip
             else:
@@ -768,8 +840,9 @@ class Display:
                 self.heartbeat_joined = True
 
     def update(self) -> bool:
-        if self.joined and not self.i % self.update_step:
+        if self.joined and self.refresh.due():
             self.joined = False
+            self.refresh.started()
             self.pe_f = self.pe.submit(
                 getdeps,
                 datasources=list(self.datasources.values()),
@@ -841,10 +914,10 @@ class Display:
 
     def render_header(self, canvas: FrameCanvas, r: int) -> int:
         self.stop_scroller.update(ppm_stop if stopsymbol else None, headername or (self.deps and self.deps[0].stopname) or "")
-        self.stop_scroller.render(canvas, r)
+        self.stop_scroller.render(canvas, r, self.clock.steps)
 
         if self.clock_in_header:
-            graphics.DrawText(canvas, self.font, self.stop_scroller.rx+1+header_spacest, r, self.clockColor, clockstr_tt(localtime()))
+            drawtext(canvas, self.font, self.stop_scroller.rx+1+header_spacest, r, self.clockColor, self.headerclock(self.clock.localtime))
 
         return self.after_stop_lineheight
 
@@ -853,17 +926,19 @@ class Display:
             # TODO: nur innerhalb der Grenzen vom Display fillen
             canvas.Fill(*self.bgColor_t)
 
-        blinkon = self.i % 60 < 30
         dep_lineheights = self.dep_lineheight_gen(self)
         r = self.y_min + self.text_startr
 
         if self.header:
-            r += self.render_header(canvas, r)
+            with self.timer.stage("render.header"):
+                r += self.render_header(canvas, r)
 
         _deprs = set()
         _deprs.add(r)
+        _depline_stage = self.timer.stage("render.depline")
         for _dli, _depline in enumerate(self.deplines):
-            _depline.render(canvas, r, blinkon)
+            with _depline_stage:
+                _depline.render(canvas, r, self.clock)
             if _dli < self.depsvisible - 1:
                 r += next(dep_lineheights)
                 _deprs.add(r)
@@ -872,12 +947,13 @@ class Display:
                 break
 
         if self.meldungvisible:
-            self.meldung_scroller.render(canvas, r)
+            with self.timer.stage("render.meldung"):
+                self.meldung_scroller.render(canvas, r, self.clock.steps)
             r += self.after_meldung_lineheight
 
         if progress:
             x_pixels = self.x_max - self.x_min + 1
-            x_progress = int(x_pixels-1 - ((self.i % self.update_step)*((x_pixels-1)/self.update_step)))
+            x_progress = int((x_pixels-1) * (1 - self.refresh.progress()))
             graphics.DrawLine(canvas, self.x_min, self.y_max, self.x_min+x_progress, self.y_max, self.progressColor)
 
     def step(self) -> None:
@@ -946,6 +1022,8 @@ class KVBDisplay(Display):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self.headerclock = ClockText(lambda tt: strftime("%A %d.%m.%Y %H:%M", tt))
+
         countdownopt.use_disp_countdown = True # damit countdown der angezeigt wird verwendet wird und nicht der anhand der uhrzeit berechnete..
 
         ds_kvb = DataSource("kvb")
@@ -958,13 +1036,12 @@ class KVBDisplay(Display):
         self.add_datasource(ds_kvb)
 
     def render_header(self, canvas: FrameCanvas, r: int) -> int:
-        toptext = datetime.now().strftime("%A %d.%m.%Y %H:%M")
-        graphics.DrawText(canvas, self.font, 0, r, self.clockColor, toptext)
+        drawtext(canvas, self.font, 0, r, self.clockColor, self.headerclock(self.clock.localtime))
         return self.after_stop_lineheight
 
 
-def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: int) -> NoReturn:
-    canvas = matrix.CreateFrameCanvas(writeppm) if FORK else matrix.CreateFrameCanvas()
+def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: float) -> NoReturn:
+    canvas = matrix.CreateFrameCanvas(readframes) if FORK else matrix.CreateFrameCanvas()
     x_min = 0
     y_min = 0
     x_max = canvas.width - 1
@@ -1000,6 +1077,7 @@ def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: int) -> NoReturn:
         linenumopt=linenumopt,
         countdownopt=countdownopt,
         platformopt=platformopt,
+        static_layers=not args.no_static_layers,
     ) for _l, _r in depcolumns for _ in range(args.lines or calc_limit)]
 
     # xmax hier muss man eigentlich immer neu berechnen
@@ -1007,7 +1085,21 @@ def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: int) -> NoReturn:
     stop_scroller = SimpleScrollline(display_x_min+2, scrollx_stop_xmax, symtextoffset, fonttext, scrollColor, symtextspacing=2, noscroll=not headerscroll)
 
     scrollx_msg_xmax = x_max if scrollmsg_through_rightbar else display_x_max
-    meldung_scroller = MultisymbolScrollline(display_x_min, scrollx_msg_xmax, symtextoffset, fonttext, scrollColor, meldungicons, bgcolor_t=matrixbgColor_t, initial_pretext=2, initial_posttext=10)
+    meldung_scroller = MultisymbolScrollline(display_x_min, scrollx_msg_xmax, symtextoffset, fonttext, scrollColor, meldungicons, bgcolor_t=matrixbgColor_t, initial_pretext=2, initial_posttext=10, strip=args.message_strip)
+
+    scheduler = FrameScheduler(sleep_interval, max_lag=args.max_frame_lag)
+    timer = StageTimer() if args.frame_stats else NullStageTimer()
+    timer.counters["frames"] = scheduler.stats
+    timer.counters["sprites"] = sprites.stats
+    for _name, _cache in caches.items():
+        timer.counters[f"cache.{_name}"] = _cache.stats
+    if ppmwriter is not None:
+        timer.counters["ppm"] = ppmwriter.stats
+    # rechte Leiste nur bei Änderungen neu zeichnen, Text muss dafür als Sprite gezeichnet werden können
+    _rightbarfn = rightbarfn if rightbar else None
+    if rightbar and sprites.max_bytes > 0 and bdf.fontdata(rightbarfont) is not None and (rightbarcolor.red or rightbarcolor.green or rightbarcolor.blue):
+        _rightbarfn = CachedArea(rightbarfn)
+        timer.counters["rightbar"] = _rightbarfn.stats
 
     displayclass = HSTDisplay if args.hst_colors else (BVGDisplay if args.bvg_id else Display)
     # displayclass = KVBDisplay
@@ -1025,6 +1117,9 @@ def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: int) -> NoReturn:
         progressColor=barColor,
         bgColor_t=matrixbgColor_t,
         update_step=args.update_steps,
+        refresh=RefreshScheduler(args.update_interval, minute_offset=args.update_minute_offset, splay=args.update_splay),
+        clock=FrameClock(args.scroll_step, args.blink_period, synced=args.synced_clock),
+        timer=timer,
         depcolumns=depcolumns,
         depcolumns_zigzag=args.column_zigzag,
         deplines=deplines,
@@ -1035,26 +1130,61 @@ def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: int) -> NoReturn:
         meldung_scroller=meldung_scroller,
         after_meldung_lineheight=args.line_height)
 
-    logger.info(f"started loop with data sources {', '.join(display.datasources.keys())}")
+    t_rightbar = timer.stage("rightbar")
+    t_update = timer.stage("update")
+    t_render = timer.stage("render")
+    t_heartbeat = timer.stage("heartbeat")
+    t_action = timer.stage("action")
+    t_ppm = timer.stage("ppm")
+    t_ring = timer.stage("ring")
+    t_swap = timer.stage("swap")
+    stats_logged = monotonic()
+
+    logger.info(f"started loop with data sources {', '.join(display.datasources.keys())}, reloading {display.refresh.offset:.1f} s after each minute and every {display.refresh.interval:.1f} s")
+    scheduler.start()
     while True:
-        # time_measure = monotonic()
+        frame_start = perf_counter()
+        display.clock.tick()
         canvas.Clear()
 
         if rightbar:
             # x_min, y_min usw. fehlen
-            rightbarfn(canvas, display.x_max+1+spaceDr, 0, rightbarwidth, rightbarfont, rightbarcolor, display.i, display.update_step, localtime(), *rightbarargs)
+            with t_rightbar:
+                _rightbarfn(canvas, display.x_max+1+spaceDr, 0, rightbarwidth, rightbarfont, rightbarcolor, display.i, display.update_step, display.clock.localtime, *rightbarargs)
 
-        display.update()
-        display.render(canvas)
+        with t_update:
+            display.update()
+        with t_render:
+            display.render(canvas)
         if CONFIG_SYSTEM:
-            display.heartbeat()
-        display.action()
-
-        if writeppm:
-            canvas.ppm(ppmfile)
+            with t_heartbeat:
+                display.heartbeat()
+        with t_action:
+            display.action()
+
+        # Bild nur einmal aus dem Canvas lesen, auf rgbmatrix ist das ein canvas.ppm() in eine Datei
+        frame = None
+        if writeppm and ppmwriter.due():
+            with t_ppm:
+                frame = frame_rgb(canvas, frame_scratch)
+                ppmwriter.submit(frame)
+        if framering is not None:
+            with t_ring:
+                if frame is None:
+                    frame = frame_rgb(canvas, frame_scratch)
+                framering.publish(frame[2])
 
         display.step()
-        canvas = matrix.SwapOnVSync(canvas)
+        with t_swap:
+            canvas = matrix.SwapOnVSync(canvas)
+        timer.add("frame", perf_counter() - frame_start)
+        if "first frame" not in startup_times:
+            startup_times["first frame"] = perf_counter() - startup_start
+            logger.info("startup (ms): " + ", ".join(f"{_k} {_v*1000:.1f}" for _k, _v in startup_times.items()))
+
+        if timer.enabled and monotonic() - stats_logged >= args.frame_stats_interval:
+            stats_logged = monotonic()
+            logger.info("frame stats (ms):\n" + timer.logstr())
 
         '''
         if gpiotest:
@@ -1064,24 +1194,28 @@ def loop(matrix: RGBMatrix, pe: Executor, sleep_interval: int) -> NoReturn:
                 matrix.brightness = ((matrix.brightness - gpiotest_minb + 1) % (gpiotest_maxb - gpiotest_minb + 1)) + gpiotest_minb
         '''
 
-        # _st = sleep_interval-monotonic()+time_measure
-        # if _st > 0:
-        #     sleep(_st)
-        if sleep_interval > 0:
-            sleep(sleep_interval)
+        dropped = scheduler.wait()
+        if dropped:
+            logger.debug(f"main loop {dropped} frames behind, dropped them ({scheduler.stats()})")
 
 
 if __name__ == "__main__":
-    logger.info("started")
+    logger.info(f"started (backend: {BACKEND})")
     matrix = RGBMatrix(options=options)
+    if args.frame_ring:
+        framering = FrameRing(args.frame_ring, matrix.width, matrix.height)
+    # getdeps läuft in den Prozessen des ProcessPoolExecutor, dort wird recording jeweils neu eingerichtet
+    recording_args = ("record", args.record) if args.record else ("replay", args.replay) if args.replay else (None, "")
+    recording_args += (args.replay_speed, time())
+    recording.install(*recording_args)
     if args.show_start:
-        startcanvas = matrix.CreateFrameCanvas(writeppm) if FORK else matrix.CreateFrameCanvas()
+        startcanvas = matrix.CreateFrameCanvas(readframes) if FORK else matrix.CreateFrameCanvas()
         startscreen(startcanvas, fontsmall, lighttextColor, ifopt, ppm_smile)
         matrix.SwapOnVSync(startcanvas)
         sleep(5)
     while True:
         try:
-            with ProcessPoolExecutor(max_workers=3) as ppe:
+            with ProcessPoolExecutor(max_workers=3, initializer=recording.install, initargs=recording_args) as ppe:
                 loop(matrix, ppe, args.sleep_interval)
         except KeyboardInterrupt:
             break
@@ -1090,4 +1224,12 @@ if __name__ == "__main__":
             break
         except Exception:
             logger.opt(exception=True).critical("exception in loop or module")
+    if ppmwriter is not None:
+        ppmwriter.close()
+    if framering is not None:
+        framering.close()
+    try:
+        remove(frame_scratch)
+    except FileNotFoundError:
+        pass
     logger.info("exiting")
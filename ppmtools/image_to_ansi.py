@@ -25,6 +25,8 @@ __license__   = 'WTFPL http://sam.zoy.org/wtfpl/'
 
 import sys, re
 
+import numpy as np
+
 CLUT = [  # color look-up table
 #    8-bit, RGB hex
 
@@ -323,6 +325,20 @@ def print_all():
     print("Printed all codes.")
     print("You can translate a hex or 0-255 code by providing an argument.")
 
+def _channel_index(part):
+    # Index of the closest value in incs, the bigger one on ties.
+    incs = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
+    for i in range(len(incs)-1):
+        s, b = incs[i], incs[i+1]  # smaller, bigger
+        if s <= part <= b:
+            return i if abs(s - part) < abs(b - part) else i+1
+
+# Per-channel quantization (0..255 -> 0..5); the color cube 16..231 is 16 + 36*r + 6*g + b.
+CHANNEL_LUT = np.array([_channel_index(v) for v in range(256)], dtype=np.uint8)
+CUBE_VALUES = ('00', '5f', '87', 'af', 'd7', 'ff')
+# Background color escape sequence per code.
+BG_ESCAPES = ['\033[48;5;%dm' % i for i in range(256)]
+
 def rgb2short(rgb):
     """ Find the closest xterm-256 approximation to the given RGB value.
     @param rgb: Hex code representing an RGB value, eg, 'abcdef'
@@ -335,27 +351,30 @@ def rgb2short(rgb):
     ('38', '00afd7')
     """
     rgb = _strip_hash(rgb)
-    incs = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
     # Break 6-char RGB code into 3 integer vals.
-    parts = [ int(h, 16) for h in re.split(r'(..)(..)(..)', rgb)[1:4] ]
-    res = []
-    for part in parts:
-        i = 0
-        while i < len(incs)-1:
-            s, b = incs[i], incs[i+1]  # smaller, bigger
-            if s <= part <= b:
-                s1 = abs(s - part)
-                b1 = abs(b - part)
-                if s1 < b1: closest = s
-                else: closest = b
-                res.append(closest)
-                break
-            i += 1
-    #print '***', res
-    res = ''.join([ ('%02.x' % i) for i in res ])
-    equiv = RGB2SHORT_DICT[ res ]
-    #print '***', res, equiv
-    return equiv, res
+    r, g, b = (CHANNEL_LUT[int(h, 16)] for h in re.split(r'(..)(..)(..)', rgb)[1:4])
+    return str(16 + 36*int(r) + 6*int(g) + int(b)), CUBE_VALUES[r] + CUBE_VALUES[g] + CUBE_VALUES[b]
+
+def shorts(frame):
+    """ xterm-256 codes for a whole frame.
+    @param frame: uint8 array of shape (height, width, 3)
+    @returns: uint8 array of shape (height, width)
+    """
+    q = CHANNEL_LUT[frame]
+    return (16 + 36*q[..., 0].astype(np.uint16) + 6*q[..., 1] + q[..., 2]).astype(np.uint8)
+
+def frame_to_ansi(frame, cell='  '):
+    """ Convert a whole frame (array of shape (height, width, 3)) to an ANSI string,
+    one cell per pixel. The background color is only set where it changes.
+    """
+    codes = shorts(np.asarray(frame, dtype=np.uint8)[..., :3])
+    out = []
+    for row in codes:
+        starts = np.flatnonzero(np.diff(row, prepend=-1))
+        lengths = np.diff(starts, append=len(row))
+        out.extend(BG_ESCAPES[row[start]] + cell*length for start, length in zip(starts.tolist(), lengths.tolist()))
+        out.append('\033[0m\n')
+    return ''.join(out)
 
 RGB2SHORT_DICT, SHORT2RGB_DICT = _create_dicts()
 
@@ -364,11 +383,5 @@ RGB2SHORT_DICT, SHORT2RGB_DICT = _create_dicts()
 if __name__ == '__main__':
     from PIL import Image
     im = Image.open(sys.argv[1])
-    for y in range(im.size[1]):
-        for x in range(im.size[0]):
-            p = im.getpixel((x,y))
-            h = "%2x%2x%2x" % (p[0],p[1],p[2])
-            short, rgb = rgb2short(h)
-            sys.stdout.write("\033[48;5;%sm  " % short)
-        sys.stdout.write("\033[0m\n")
+    sys.stdout.write(frame_to_ansi(np.asarray(im.convert('RGB'))))
     sys.stdout.write("\n")
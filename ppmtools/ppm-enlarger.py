@@ -1,41 +1,88 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+# Vergrößert Matrix-Bilder (z. B. --write-ppm-Ausgabe) mit sichtbarem Pixelraster.
+# Einzelne Datei:       ppm-enlarger.py frame.ppm                       (-> out-mod.ppm)
+# Verzeichnis/Dateien:  ppm-enlarger.py frames/ --gif clip.gif --fps 10
+#                       ppm-enlarger.py frames/ --png-dir out/
 
-import sys
-
-repeat = 5
-spacing = 2
-bgcolor_t = (8,8,8)
-
-with open(sys.argv[1], "rb") as f:
-    b = f.read()
-
-_firstn = b.index(b"\n")
-orig_width, orig_height = map(int, b[_firstn+1:b.index(b"\n", _firstn+1)].split(b" "))
-width = orig_width*repeat+orig_width*spacing
-height = orig_height*repeat+orig_height*spacing
-
-_s = b"255\n"
-_p = b.index(_s) + len(_s)
-
-tmp = bytearray()
-for _i in range(orig_width*orig_height):
-    start = _p + _i*3
-    end = start + 3
-    _bytes = b[start:end]
-    tmp.extend(bytearray(bgcolor_t)*spacing)
-    tmp.extend(bytearray(_bytes)*repeat)
-
-out = bytearray()
-for _w in range(height):
-    start = _w*width*3
-    end = start + width*3
-    _lb = tmp[start:end]
-    out.extend(bytearray(bgcolor_t)*(width+spacing)*spacing)
-    out.extend((_lb+bytearray(bgcolor_t)*spacing)*repeat)
-height += spacing
-width += spacing
-out.extend(bytearray(bgcolor_t)*width*spacing)
-
-with open("out-mod.ppm", "wb") as f:
-    f.write(b"P6\n"+bytes(str(width), encoding='ascii')+b" "+bytes(str(height), encoding='ascii')+b"\n255\n"+out)
+from argparse import ArgumentParser
+from glob import glob
+from os import makedirs, path
+from re import split as re_split
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+_extensions = (".ppm", ".png", ".pnm", ".bmp")
+
+
+def enlarge(frame: np.ndarray, repeat: int = 5, spacing: int = 2, bgcolor_t: Tuple[int, int, int] = (8, 8, 8)) -> np.ndarray:
+    # jedes Pixel wird ein repeat x repeat großes Quadrat, davor und am Ende spacing Pixel Hintergrund
+    height, width = frame.shape[:2]
+    cell = repeat + spacing
+    out = np.empty((height*cell + spacing, width*cell + spacing, 3), dtype=np.uint8)
+    out[:] = bgcolor_t
+    cells = out[spacing:, spacing:].reshape(height, cell, width, cell, 3)
+    cells[:, :repeat, :, :repeat] = frame[:, None, :, None, :3]
+    return out
+
+
+def _natural(filename: str) -> List:
+    # "frame-10.ppm" nach "frame-9.ppm"
+    return [int(_p) if _p.isdigit() else _p for _p in re_split(r"(\d+)", filename)]
+
+
+def inputfiles(inputs: Iterable[str]) -> List[str]:
+    files: List[str] = []
+    for _i in inputs:
+        if path.isdir(_i):
+            # Dateinamen der Aufnahmen sind fortlaufend nummeriert, also nach Namen sortieren
+            files.extend(sorted((_f for _f in glob(path.join(_i, "*")) if _f.lower().endswith(_extensions)), key=_natural))
+        else:
+            files.extend(sorted(glob(_i), key=_natural) or [_i])
+    return files
+
+
+def frames(files: Iterable[str], repeat: int, spacing: int, bgcolor_t: Tuple[int, int, int]) -> Iterator[Image.Image]:
+    for _f in files:
+        with Image.open(_f) as im:
+            yield Image.fromarray(enlarge(np.asarray(im.convert("RGB")), repeat, spacing, bgcolor_t))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="enlarge matrix frames with visible pixel grid")
+    parser.add_argument("inputs", nargs="+", help="image files (ppm, png, ...), globs or directories")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="output pixels per matrix pixel. Default: 5")
+    parser.add_argument("-s", "--spacing", type=int, default=2, help="background pixels between matrix pixels. Default: 2")
+    parser.add_argument("--bgcolor", default="080808", help="background color as hex. Default: 080808")
+    parser.add_argument("-o", "--output", default="out-mod.ppm", help="output file for a single input frame. Default: out-mod.ppm")
+    parser.add_argument("--gif", default="", help="write all frames as animated GIF")
+    parser.add_argument("--webp", default="", help="write all frames as animated WebP")
+    parser.add_argument("--png-dir", default="", help="write all frames as numbered PNG files into this directory")
+    parser.add_argument("--fps", type=float, default=10, help="frames per second for --gif/--webp. Default: 10")
+    parser.add_argument("--every", type=int, default=1, help="only use every n-th input frame. Default: 1")
+    args = parser.parse_args()
+
+    bgcolor_t = tuple(int(args.bgcolor.lstrip("#")[i:i+2], 16) for i in (0, 2, 4))
+    files = inputfiles(args.inputs)[::max(1, args.every)]
+    if not files:
+        parser.error("no input frames found")
+
+    if args.png_dir:
+        makedirs(args.png_dir, exist_ok=True)
+        _digits = len(str(len(files)))
+        for _n, _im in enumerate(frames(files, args.repeat, args.spacing, bgcolor_t)):
+            _im.save(path.join(args.png_dir, f"{_n:0{_digits}}.png"))
+    for _out, _format in ((args.gif, "GIF"), (args.webp, "WEBP")):
+        if not _out:
+            continue
+        _frames = frames(files, args.repeat, args.spacing, bgcolor_t)
+        _first = next(_frames)
+        # aufeinanderfolgende gleiche Bilder fasst Pillow zusammen (längere Dauer)
+        _first.save(_out, format=_format, save_all=True, append_images=_frames,
+                    duration=int(round(1000 / args.fps)), loop=0, **({"lossless": True} if _format == "WEBP" else {}))
+    if not (args.png_dir or args.gif or args.webp):
+        if len(files) > 1:
+            parser.error("several input frames, use --gif, --webp or --png-dir")
+        next(frames(files, args.repeat, args.spacing, bgcolor_t)).save(args.output, format="PPM")
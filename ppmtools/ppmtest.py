@@ -1,32 +1,75 @@
 from PIL import Image, ImageFile
-from image_to_ansi import rgb2short
-from sys import argv
+from image_to_ansi import BG_ESCAPES, frame_to_ansi, shorts
+from os import path, stat
+from stat import S_ISFIFO
+from sys import argv, path as sys_path, stdout
+from time import sleep
+import numpy as np
+
+sys_path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from dm.framering import FrameRingReader
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
-colors = {}
+# PPM-Datei/FIFO (--write-ppm) oder Ringpuffer (--frame-ring)
 filename = argv[1] if len(argv) > 1 else '/tmp/out.ppm'
 
-with open(filename, 'rb') as f:
-    while True:
-        s = False
-        while not s:
+
+def ppmframes():
+    # FIFO: Bilder nacheinander aus einem Stream; reguläre Datei (wird beim Schreiben
+    # per rename ersetzt): für jedes Bild neu öffnen
+    if S_ISFIFO(stat(filename).st_mode):
+        with open(filename, 'rb') as f:
+            while True:
+                try:
+                    im = Image.open(f)
+                except Exception as e:
+                    print(e)
+                else:
+                    yield np.asarray(im.convert("RGB"))
+    else:
+        while True:
             try:
-                im = Image.open(f)
+                im = Image.open(filename)
+                im.load()
             except Exception as e:
                 print(e)
             else:
-                s = True
-        _ppmstr = ""
-        for y in range(im.size[1]):
-            for x in range(im.size[0]):
-                p = im.getpixel((x,y))
-                h = "%2x%2x%2x" % (p[0],p[1],p[2])
-                short = colors.get(h)
-                if short is None:
-                    short = rgb2short(h)[0]
-                    colors[h] = short
-                _ppmstr += "\033[48;5;%sm  " % short
-            _ppmstr += "\033[0m\n"
-        _ppmstr += "\n"
-        print(_ppmstr)
+                yield np.asarray(im.convert("RGB"))
+
+
+def ringframes(poll=0.005):
+    ring = FrameRingReader(filename)
+    last = 0
+    while True:
+        seq = ring.latest_seq()
+        if seq == last:
+            sleep(poll)
+            continue
+        latest = ring.latest()
+        if latest is None:
+            continue
+        seq, data = latest
+        # erst kopieren, dann prüfen, ob der Slot währenddessen neu beschrieben wurde; sonst verwerfen
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(ring.height, ring.width, ring.channels).copy()
+        if not ring.valid(seq):
+            continue
+        last = seq
+        yield frame
+
 
+prev = None
+for frame in (ringframes() if FrameRingReader.check(filename) else ppmframes()):
+    if prev is None or prev.shape != frame.shape:
+        # erstes Bild: alles zeichnen
+        stdout.write("\033[2J\033[H" + frame_to_ansi(frame))
+    else:
+        # danach nur geänderte Zellen neu zeichnen (Cursor positionieren, zwei Zeichen pro Pixel)
+        changed = (frame != prev).any(axis=2)
+        if changed.any():
+            codes = shorts(frame)
+            out = ["\033[%d;%dH%s  " % (y + 1, 2 * x + 1, BG_ESCAPES[codes[y, x]])
+                   for y, x in zip(*(_a.tolist() for _a in np.nonzero(changed)))]
+            out.append("\033[0m\033[%d;1H" % (frame.shape[0] + 1))
+            stdout.write("".join(out))
+    stdout.flush()
+    prev = frame.copy()
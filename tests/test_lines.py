@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Laufschrift mit dem headless-Backend, ohne Matrix: python -m pytest tests
+import signal
+from glob import glob
+from os import environ, path
+
+import pytest
+
+environ.setdefault("DM_BACKEND", "headless")
+
+from dm.backend import RGBMatrix, RGBMatrixOptions, graphics  # noqa: E402
+from dm.depdata import Meldung  # noqa: E402
+from dm.drawstuff import loadfont  # noqa: E402
+from dm.lines import MultisymbolScrollline  # noqa: E402
+
+RES = path.join(path.dirname(path.dirname(path.abspath(__file__))), "res")
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    options = RGBMatrixOptions()
+    options.rows = 32
+    options.cols = 96
+    return RGBMatrix(options=options)
+
+
+@pytest.fixture(scope="module")
+def font():
+    return loadfont(sorted(glob(path.join(RES, "bdf", "*.bdf")))[0])
+
+
+def _timeout(signum, frame):
+    raise TimeoutError("render did not return")
+
+
+@pytest.mark.parametrize("strip", [False, True])
+@pytest.mark.parametrize("steps", [0, 1, 3])
+@pytest.mark.parametrize("texts", [[""], ["", ""], ["", "ab"]])
+def test_empty_meldung(matrix, font, strip, steps, texts):
+    # Meldungen ohne Text und ohne Symbol haben keine Breite und dürfen nicht endlos durchlaufen werden
+    line = MultisymbolScrollline(0, 95, 0, font, graphics.Color(255, 255, 255), {}, strip=strip)
+    line.update([Meldung(None, _text) for _text in texts])
+    _handler = signal.signal(signal.SIGALRM, _timeout)
+    signal.alarm(10)
+    try:
+        for _ in range(1000):
+            line.render(matrix.CreateFrameCanvas(), 20, steps)
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, _handler)